@@ -1,34 +1,91 @@
 import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Query
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from functools import lru_cache
 from urllib.parse import quote
 from markupsafe import Markup
+import hashlib
 import json
 import os
 import time
 
 from app.services.dexscreener import (
-    search_pairs,
-    fetch_token_pairs,
+    search_pairs_checked,
     solana_pairs_only,
-    pick_best_pair_by_liquidity_usd,
 )
-from app.services.token_security import fetch_mint_security
+from app.services.token_security import fetch_mint_security_many, is_blacklisted
 
 from app.services.dexscreener_discovery import (
     fetch_latest_token_profiles,
     fetch_top_boosted_tokens,
     fetch_pairs_for_tokens,
+    refresh_latest_token_profiles,
+    refresh_top_boosted_tokens,
 )
 
 from app.services.risk import compute_risk
-from app.services.ttl_cache import cache
+from app.services.pairs import (
+    PairRecord,
+    to_records,
+    raw_pairs,
+    rarity_from_liq,
+    dedupe_best_pair_per_token,
+    record_filter,
+    top_k,
+    sort_name,
+    SortedUniverse,
+)
+from app.services.cache import cache
+from app.services.http import http_clients
+from app.services.metrics import observe_render, render_metrics, run_loop_lag_monitor
+from app.services.singleflight import load_cached, load_swr, refresh_cached, spawn_background
+from app.services.ingest import ingest_pairs
+from app.services.search_index import search_index
+from app.services.price_history import price_history
+from app.services.prefetch import scheduler
+from app.services.crawler import crawler
+from app.services.pair_universe import pair_universe
+from app.services.screener import ColumnarSnapshot, ScreenerError, compile_filter, snapshot_of
+from app.services.ratelimit import limiter_stats
+from app.services.breaker import breakers
+from app.services.token_snapshots import TokenSnapshotService
+from app.services.live import LiveHub
+from app.services.timing import ServerTimingMiddleware, note_cache, stage, stage_stats
+from app.settings import CRAWLER_ENABLED, CRAWLER_INTERVAL_SECONDS, PREFETCH_ENABLED, TIMING_ALWAYS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    http_clients.open()
+    sweeper = asyncio.create_task(cache.run_sweeper())
+    lag_monitor = asyncio.create_task(run_loop_lag_monitor())
+    if PREFETCH_ENABLED:
+        scheduler.start()
+    try:
+        yield
+    finally:
+        await scheduler.stop()
+        await live_hub.stop()
+        sweeper.cancel()
+        lag_monitor.cancel()
+        await http_clients.aclose()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
+app.add_middleware(ServerTimingMiddleware, always=TIMING_ALWAYS)
+
+
+def render_template(name: str, context: dict, **kwargs):
+    started = time.perf_counter()
+    with stage(f"render.{name}"):
+        resp = templates.TemplateResponse(name, context, **kwargs)
+    observe_render(name, time.perf_counter() - started)
+    return resp
 
 # -------------------------
 # App config
@@ -38,6 +95,8 @@ QUOTE_DEFAULT = ["USDC", "USDT", "SOL"]
 CACHE_TTL_LIST = 20         # seconds
 CACHE_TTL_TOKEN = 20        # seconds
 CACHE_TTL_SEARCH = 15       # seconds
+CACHE_STALE_LIST = 600      # extra seconds a list/token page may be served stale
+CACHE_STALE_TOKEN = 600
 
 VERIFIED_JSON_PATH = os.path.join("app", "data", "verified_tokens.json")
 
@@ -155,8 +214,17 @@ def _hash_to_colors(s: str) -> tuple[str, str]:
         return f"#{r:02x}{g:02x}{bl:02x}"
     return hue_to_hex(a, 0.85, 0.95), hue_to_hex(b, 0.85, 0.95)
 
-def token_avatar_data_uri(address: str) -> str:
-    addr = (address or "").strip() or "unknown"
+# Avatars and sparklines are pure functions of their inputs and the same tokens
+# are rendered over and over, so both are memoized.
+RENDER_MEMO_SIZE = 8192
+AVATAR_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Part of every avatar URL, so cached avatars are only immutable per version:
+# bump it whenever token_avatar_svg's output changes.
+AVATAR_VERSION = "1"
+
+@lru_cache(maxsize=RENDER_MEMO_SIZE)
+def token_avatar_svg(addr: str) -> tuple[str, str]:
+    """(svg, strong etag) for an address's generated avatar."""
     c1, c2 = _hash_to_colors(addr)
     svg = f"""
     <svg xmlns="http://www.w3.org/2000/svg" width="64" height="64" viewBox="0 0 64 64">
@@ -176,27 +244,47 @@ def token_avatar_data_uri(address: str) -> str:
       <circle cx="32" cy="32" r="26" fill="none" stroke="rgba(255,255,255,0.15)" stroke-width="2"/>
     </svg>
     """.strip()
-    return "data:image/svg+xml;utf8," + quote(svg)
+    etag = '"' + hashlib.blake2b(svg.encode("utf-8"), digest_size=12).hexdigest() + '"'
+    return svg, etag
 
-def sparkline_svg(price_change: dict | None, width: int = 190, height: int = 56, pad: int = 6) -> Markup:
-    pc = price_change or {}
+def token_avatar_url(address: str) -> str:
+    addr = (address or "").strip() or "unknown"
+    return f"/avatar/{quote(addr, safe='')}.svg?v={AVATAR_VERSION}"
+
+SPARK_POINTS = 48
+
+def _change_points(pc: dict) -> tuple[tuple[float, float], ...]:
+    """Fallback shape from DexScreener's h24/h6/h1 changes, in % relative to now."""
     def f(key):
         try:
             return float(pc.get(key))
         except Exception:
             return None
-    h24 = f("h24")
-    h6 = f("h6")
-    h1 = f("h1")
-
+    h24, h6, h1 = f("h24"), f("h6"), f("h1")
     if h24 is None and h6 is None and h1 is None:
-        pts = [(0, 0.0), (24, 0.0)]
+        return ((0, 0.0), (24, 0.0))
+    v0 = -h24 if h24 is not None else 0.0
+    v18 = -h6 if h6 is not None else 0.0
+    v23 = -h1 if h1 is not None else v18
+    return ((0, v0), (18, v18), (23, v23), (24, 0.0))
+
+def sparkline_svg(pair: dict | None, width: int = 190, height: int = 56, pad: int = 6) -> Markup:
+    """
+    Sparkline for a pair from its recorded intraday prices, as % change
+    relative to the latest price. Until a few samples exist it falls back
+    to a shape derived from priceChange.
+    """
+    pair = pair or {}
+    prices = price_history.prices(pair.get("pairAddress") or "", max_points=SPARK_POINTS)
+    if len(prices) >= 3 and prices[-1] > 0:
+        last = prices[-1]
+        pts = tuple((i, (p / last - 1) * 100) for i, p in enumerate(prices))
     else:
-        v0 = -h24 if h24 is not None else 0.0
-        v18 = -h6 if h6 is not None else 0.0
-        v23 = -h1 if h1 is not None else v18
-        pts = [(0, v0), (18, v18), (23, v23), (24, 0.0)]
+        pts = _change_points(pair.get("priceChange") or {})
+    return _sparkline_markup(pts, width, height, pad)
 
+@lru_cache(maxsize=RENDER_MEMO_SIZE)
+def _sparkline_markup(pts: tuple[tuple[float, float], ...], width: int, height: int, pad: int) -> Markup:
     xs = [p[0] for p in pts]
     ys = [p[1] for p in pts]
     min_y, max_y = min(ys), max(ys)
@@ -219,7 +307,7 @@ def sparkline_svg(price_change: dict | None, width: int = 190, height: int = 56,
     return Markup(svg)
 
 templates.env.filters["compact"] = format_compact
-templates.env.filters["avatar"] = token_avatar_data_uri
+templates.env.filters["avatar"] = token_avatar_url
 templates.env.filters["age"] = age_from_ms
 templates.env.filters["pct"] = pct_fmt
 templates.env.filters["pctclass"] = pct_class
@@ -229,211 +317,84 @@ templates.env.filters["spark"] = sparkline_svg
 # Pair selection + rarity + verified
 # -------------------------
 
-def _liq_usd(p: dict) -> float:
-    try:
-        return float(((p.get("liquidity") or {}).get("usd") or 0))
-    except Exception:
-        return 0.0
-
-def _mcap(p: dict) -> float:
-    try:
-        return float(p.get("marketCap") or p.get("fdv") or 0)
-    except Exception:
-        return 0.0
-
-def _vol24(p: dict) -> float:
-    try:
-        return float(((p.get("volume") or {}).get("h24") or 0))
-    except Exception:
-        return 0.0
-
-def _txns24(p: dict) -> float:
-    try:
-        t = (p.get("txns") or {}).get("h24") or {}
-        return float((t.get("buys") or 0) + (t.get("sells") or 0))
-    except Exception:
-        return 0.0
-
-def _age_ms(p: dict) -> int:
-    try:
-        return int(p.get("pairCreatedAt") or 0)
-    except Exception:
-        return 0
-
-def _h24(p: dict) -> float:
-    try:
-        return float(((p.get("priceChange") or {}).get("h24") or 0))
-    except Exception:
-        return 0.0
-
-
-def _txns_sum(p: dict) -> float:
-    try:
-        t = (p.get("txns") or {}).get("h24") or {}
-        return float((t.get("buys") or 0) + (t.get("sells") or 0))
-    except Exception:
-        return 0.0
-
-
-def _liq_locked(p: dict) -> bool | None:
-    liq = p.get("liquidity") or {}
-    if not isinstance(liq, dict):
-        return None
-    if "locked" in liq:
-        return bool(liq.get("locked"))
-    if "isLocked" in liq:
-        return bool(liq.get("isLocked"))
-    status = liq.get("lockStatus") or liq.get("status")
-    if isinstance(status, str):
-        s = status.lower()
-        if s in ("locked", "lockedliquidity", "locked_liquidity"):
-            return True
-        if s in ("unlocked", "notlocked"):
-            return False
-    return None
-
-
-async def _security_map(base_mints: list[str]) -> dict[str, dict]:
-    unique: list[str] = []
-    seen = set()
-    for m in base_mints:
-        if not m or m in seen:
-            continue
-        seen.add(m)
-        unique.append(m)
-    results = await asyncio.gather(*(fetch_mint_security(m) for m in unique))
-    return {m: r for m, r in zip(unique, results)}
-
-
-async def annotate_pairs_with_risk(pairs: list[dict]) -> list[dict]:
-    if not pairs:
+async def annotate_pairs_with_risk(records: list[PairRecord]) -> list[PairRecord]:
+    if not records:
         return []
 
-    base_mints = [(p.get("baseToken") or {}).get("address") for p in pairs]
-    sec_map = await _security_map(base_mints)
+    sec_map = await fetch_mint_security_many([r.base_address for r in records])
 
-    enriched: list[dict] = []
-    for p in pairs:
-        base = (p.get("baseToken") or {}).get("address")
-        sec = sec_map.get(base, {})
+    enriched: list[PairRecord] = []
+    for r in records:
+        sec = sec_map.get(r.base_address, {})
 
         is_mintable = bool(sec.get("is_mintable"))
         is_freezable = bool(sec.get("is_freezable"))
-        liq_locked = _liq_locked(p)
 
-        # Blacklist mintable or freezable tokens
-        if is_mintable or is_freezable:
+        if is_blacklisted(sec):
             continue
 
+        p = r.raw
         p["_isMintable"] = is_mintable
         p["_isFreezable"] = is_freezable
-        p["_liquidityLocked"] = liq_locked
+        p["_liquidityLocked"] = r.liq_locked
         p["_mintAuthority"] = sec.get("mintAuthority")
         p["_freezeAuthority"] = sec.get("freezeAuthority")
 
         risk_input = {
-            "liquidityUsd": _liq_usd(p),
-            "volume24h": _vol24(p),
-            "txns24h": _txns_sum(p),
-            "pairCreatedAt": _age_ms(p),
-            "priceChange24h": (p.get("priceChange") or {}).get("h24"),
+            "liquidityUsd": r.liq_usd,
+            "volume24h": r.vol24,
+            "txns24h": r.txns24,
+            "pairCreatedAt": r.created_ms,
+            "priceChange24h": r.h24,
         }
         risk_score, risk_label = compute_risk(
             risk_input,
-            is_verified=p.get("_verified", False),
+            is_verified=r.verified,
             is_mintable=is_mintable,
             is_freezable=is_freezable,
-            liq_locked=liq_locked,
+            liq_locked=r.liq_locked,
         )
+        r.risk_score = risk_score
+        r.risk_label = risk_label
         p["_riskScore"] = risk_score
         p["_riskLabel"] = risk_label
         p["_riskClass"] = risk_label.lower()
-        enriched.append(p)
+        enriched.append(r)
 
     return enriched
 
-def rarity_from_liq(liq_usd: float) -> str:
-    if liq_usd >= 10_000_000: return "legendary"
-    if liq_usd >= 1_000_000:  return "epic"
-    if liq_usd >= 100_000:    return "rare"
-    return "common"
-
-def decorate_pair(p: dict) -> dict:
-    liq = _liq_usd(p)
-    base = (p.get("baseToken") or {}).get("address") or ""
-    p["_liqUsd"] = liq
-    p["_rarity"] = rarity_from_liq(liq)
-    p["_verified"] = (base in VERIFIED_MINTS)
-    return p
-
-def quote_ranker(quote_pref: list[str]):
-    pref = [x.upper() for x in quote_pref]
-    def _rank(p: dict) -> int:
-        sym = ((p.get("quoteToken") or {}).get("symbol") or "").upper()
-        try:
-            return pref.index(sym)
-        except ValueError:
-            return 999
-    return _rank
-
-def dedupe_best_pair_per_token(pairs: list[dict], quote_pref: list[str], limit: int = 36) -> list[dict]:
-    rank = quote_ranker(quote_pref)
-    best_by_token: dict[str, dict] = {}
-
-    for p in pairs:
-        base = (p.get("baseToken") or {}).get("address")
-        if not base:
-            continue
-        p = decorate_pair(p)
-        existing = best_by_token.get(base)
-        if not existing:
-            best_by_token[base] = p
-            continue
-        liq_new = _liq_usd(p)
-        liq_old = _liq_usd(existing)
-        if liq_new > liq_old:
-            best_by_token[base] = p
-        elif liq_new == liq_old and rank(p) < rank(existing):
-            best_by_token[base] = p
-
-    result = list(best_by_token.values())
-    result.sort(key=lambda p: (_liq_usd(p), -rank(p)), reverse=True)
-    return result[:limit]
-
-def apply_filters(pairs: list[dict], min_liq: float, min_vol: float, max_age_hours: float | None) -> list[dict]:
-    now_ms = int(time.time() * 1000)
-    out = []
-    for p in pairs:
-        liq = _liq_usd(p)
-        vol = _vol24(p)
-        if liq < min_liq:
-            continue
-        if vol < min_vol:
-            continue
-        if max_age_hours is not None and max_age_hours > 0:
-            created = _age_ms(p)
-            if created > 0:
-                age_hours = (now_ms - created) / (1000 * 60 * 60)
-                if age_hours > max_age_hours:
-                    continue
-        out.append(p)
-    return out
-
-def apply_sort(pairs: list[dict], sort: str) -> list[dict]:
-    s = (sort or "liq").lower()
-    if s == "mcap":
-        pairs.sort(key=_mcap, reverse=True)
-    elif s == "vol":
-        pairs.sort(key=_vol24, reverse=True)
-    elif s == "age":
-        pairs.sort(key=_age_ms, reverse=True)  # newest first
-    elif s == "h24":
-        pairs.sort(key=_h24, reverse=True)
-    elif s == "txns":
-        pairs.sort(key=_txns24, reverse=True)
-    else:
-        pairs.sort(key=_liq_usd, reverse=True)
-    return pairs
+def decorate_pair(r: PairRecord) -> PairRecord:
+    r.rarity = rarity_from_liq(r.liq_usd)
+    r.verified = r.base_address in VERIFIED_MINTS
+    p = r.raw
+    p["_liqUsd"] = r.liq_usd
+    p["_rarity"] = r.rarity
+    p["_verified"] = r.verified
+    return r
+
+async def enrich_records(records: list[PairRecord]) -> list[PairRecord]:
+    return await annotate_pairs_with_risk([decorate_pair(r) for r in records])
+
+
+token_snapshots = TokenSnapshotService(enrich_records, ttl=CACHE_TTL_TOKEN, stale_ttl=CACHE_STALE_TOKEN)
+live_hub = LiveHub(token_snapshots)
+
+def select_pairs(
+    universe: SortedUniverse | list[PairRecord],
+    min_liq: float,
+    min_vol: float,
+    max_age_hours: float | None,
+    sort: str,
+    limit: int,
+) -> list[PairRecord]:
+    """
+    Per-request view over a cached universe; never mutates it. Walks the
+    pre-sorted order when the universe has one, else takes a heap top-K.
+    """
+    keep = record_filter(min_liq, min_vol, max_age_hours)
+    if isinstance(universe, SortedUniverse):
+        return universe.select(sort, limit, keep)
+    return top_k(universe, sort, limit, keep)
 
 # -------------------------
 # Tabs
@@ -445,20 +406,284 @@ TABS = {
     "trending": "Trending",
     "graduated": "Newly graduated",
     "verified": "Verified",
+    "gainers": "Top gainers",
+    "volume": "Top volume",
+    "new": "New pairs",
     "watchlist": "Watchlist",
 }
 
+DISCOVER_TABS = ("trending", "graduated", "verified", "gainers", "volume", "new")
+# Screener tabs served from the crawled pair universe: default sort and the
+# minimum liquidity a pair needs to be listed.
+LOCAL_TABS = {"gainers": "h24", "volume": "vol", "new": "age"}
+LOCAL_TAB_MIN_LIQ = {"gainers": 10_000, "volume": 0, "new": 5_000}
+TAB_DEDUPE_LIMIT = {"trending": 120, "graduated": 200, "verified": 80, "gainers": 200, "volume": 200, "new": 200}
+TAB_PAGE_SIZE = {"trending": 48, "graduated": 36, "verified": 36, "gainers": 48, "volume": 48, "new": 48}
+TAB_SOURCE_TTL = 60         # seconds; prefetch refreshes well inside this
+SCREENER_SNAPSHOT_TTL = 15  # seconds; about one crawler tick
+SCREENER_MAX_LIMIT = 500
+
+
+async def _fetch_tab_source(tab: str) -> list[PairRecord]:
+    if tab == "trending":
+        boosted = await fetch_top_boosted_tokens()
+        token_addrs = [x.get("tokenAddress") for x in boosted if x.get("tokenAddress")]
+    elif tab == "graduated":
+        profiles = await fetch_latest_token_profiles()
+        token_addrs = [x.get("tokenAddress") for x in profiles if x.get("tokenAddress")]
+    else:
+        token_addrs = list(VERIFIED_TOKENS.values())
+    pairs = await fetch_pairs_for_tokens(token_addrs)
+    with stage("ingest"):
+        return ingest_pairs(to_records(solana_pairs_only(pairs)))
+
+
+async def tab_source_pairs(tab: str) -> tuple[list[PairRecord], bool]:
+    """Raw Solana pairs behind a discovery tab, shared by every quote preference."""
+    if tab in LOCAL_TABS:
+        # Already ingested and kept current by the crawler; caching a copy of
+        # the whole universe per tab would crowd everything else out of the cache.
+        return pair_universe.records(), False
+    return await load_swr(cache, f"tabsrc:{tab}", TAB_SOURCE_TTL, CACHE_STALE_LIST, lambda: _fetch_tab_source(tab))
+
+
+async def _build_tab_universe(tab: str, quote: str) -> SortedUniverse:
+    quote_pref = [quote, "USDT", "SOL"] if quote else QUOTE_DEFAULT
+    sol, _ = await tab_source_pairs(tab)
+    with stage("dedupe"):
+        if tab in LOCAL_TABS:
+            # Rank by the tab's own key; the liquidity ranking dedupe uses
+            # would push small-cap gainers and fresh pairs out of the cut.
+            best = top_k(
+                dedupe_best_pair_per_token(sol, quote_pref, limit=len(sol)),
+                LOCAL_TABS[tab],
+                TAB_DEDUPE_LIMIT[tab],
+                record_filter(LOCAL_TAB_MIN_LIQ[tab], 0, None),
+            )
+        else:
+            best = dedupe_best_pair_per_token(sol, quote_pref, limit=TAB_DEDUPE_LIMIT[tab])
+    with stage("enrich"):
+        records = await enrich_records(best)
+    return SortedUniverse(records)
+
+
+async def tab_universe(tab: str, quote: str) -> tuple[SortedUniverse, bool]:
+    """
+    Deduped, risk-annotated pairs for a tab and quote preference. Filters and
+    sort are applied per request on top of this (see select_pairs).
+    """
+    universe, stale = await load_swr(
+        cache, f"disc:{tab}:{quote}", CACHE_TTL_LIST, CACHE_STALE_LIST, lambda: _build_tab_universe(tab, quote)
+    )
+    if not stale:
+        # The universe may be fresh while the source behind it is last-known-good.
+        _, stale = await tab_source_pairs(tab)
+    return universe, stale
+
+# -------------------------
+# Background prefetch
+# -------------------------
+
+async def _prefetch_tab(tab: str):
+    pairs = await refresh_cached(cache, f"tabsrc:{tab}", TAB_SOURCE_TTL, CACHE_STALE_LIST, lambda: _fetch_tab_source(tab))
+    await fetch_mint_security_many([r.base_address for r in pairs])
+    # Default quote preference is what most visitors land on.
+    await refresh_cached(
+        cache, f"disc:{tab}:{QUOTE_DEFAULT[0]}", CACHE_TTL_LIST, CACHE_STALE_LIST,
+        lambda: _build_tab_universe(tab, QUOTE_DEFAULT[0]),
+    )
+
+
+async def _build_screener_snapshot() -> ColumnarSnapshot:
+    records = pair_universe.records()
+    # Same blacklist as the pages. Lookups are cached for an hour, so a
+    # rebuild only asks the RPC about mints the crawler added since the last one.
+    sec_map = await fetch_mint_security_many([r.base_address for r in records])
+    records = [r for r in records if not is_blacklisted(sec_map.get(r.base_address))]
+    # Tens of milliseconds per column at full universe size: keep it off the event loop.
+    return await asyncio.to_thread(ColumnarSnapshot, records)
+
+
+async def screener_snapshot() -> tuple[ColumnarSnapshot, bool]:
+    """Columnar copy of the crawled pair universe, rebuilt in the background every few seconds."""
+    return await load_swr(cache, "screener:universe", SCREENER_SNAPSHOT_TTL, CACHE_STALE_LIST, _build_screener_snapshot)
+
+
+async def _prefetch_screener():
+    await refresh_cached(cache, "screener:universe", SCREENER_SNAPSHOT_TTL, CACHE_STALE_LIST, _build_screener_snapshot)
+
+
+scheduler.add("boosts", refresh_top_boosted_tokens, interval=30)
+scheduler.add("profiles", refresh_latest_token_profiles, interval=30)
+scheduler.add("tab:trending", lambda: _prefetch_tab("trending"), interval=20)
+scheduler.add("tab:graduated", lambda: _prefetch_tab("graduated"), interval=20)
+scheduler.add("tab:verified", lambda: _prefetch_tab("verified"), interval=60)
+if CRAWLER_ENABLED:
+    scheduler.add("crawler", crawler.tick, interval=CRAWLER_INTERVAL_SECONDS)
+    scheduler.add("screener", _prefetch_screener, interval=SCREENER_SNAPSHOT_TTL)
+
 # -------------------------
 # Pages
 # -------------------------
 
 @app.get("/", response_class=HTMLResponse)
 async def home_positions(request: Request):
-    return templates.TemplateResponse(
+    return render_template(
         "positions.html",
         {"request": request, "active_tab": "positions", "title": "Open Positions", "tabs": TABS},
     )
 
+async def search_view(
+    q: str | None,
+    sort: str,
+    min_liq: float,
+    min_vol: float,
+    max_age_h: float | None,
+    quote: str,
+    density: str,
+) -> dict:
+    query = (q or "").strip()
+    pairs = []
+    note = None
+
+    quote_pref = [quote, "USDT", "SOL"] if quote else QUOTE_DEFAULT
+
+    if query:
+        cache_key = f"search:{query}:{quote}"
+
+        async def load():
+            # Raises on failure, so only real DexScreener answers are cached.
+            all_pairs, _ = await search_pairs_checked(query)
+            sol = ingest_pairs(to_records(solana_pairs_only(all_pairs)))
+            best = dedupe_best_pair_per_token(sol, quote_pref, limit=80)
+            return await enrich_records(best)
+
+        universe = cache.get(cache_key)
+        note_cache(cache_key, universe is not None)
+        with stage("search_index"):
+            # An empty cached answer still lets local matches through.
+            local = search_index.search(query) if not universe else []
+        if local:
+            # Answer from tokens we have already seen; DexScreener results
+            # replace these once the background search lands in the cache.
+            spawn_background(load_cached(cache, cache_key, CACHE_TTL_SEARCH, load))
+            with stage("enrich"):
+                universe = await enrich_records(dedupe_best_pair_per_token(local, quote_pref, limit=80))
+            note = "Showing matches from recently seen tokens. Refresh for full DexScreener results."
+        elif universe is None:
+            try:
+                with stage("search_upstream"):
+                    universe = await load_cached(cache, cache_key, CACHE_TTL_SEARCH, load)
+            except Exception as e:
+                print(f"[token_universe] search {query!r} failed: {e!r}")
+                universe = []
+                note = "DexScreener search is unavailable right now. Try again in a moment."
+        with stage("select"):
+            pairs = raw_pairs(select_pairs(universe, min_liq, min_vol, max_age_h, sort, 36))
+    else:
+        note = "Search for any Solana meme token by symbol, name, or address."
+
+    return {
+        "pairs": pairs,
+        "q": query,
+        "active_tab": "search",
+        "title": "Search",
+        "note": note,
+        "tabs": TABS,
+        "ui": {
+            "sort": sort,
+            "min_liq": min_liq,
+            "min_vol": min_vol,
+            "max_age_h": max_age_h,
+            "quote": quote,
+            "density": density
+        }
+    }
+
+async def discover_view(
+    tab: str,
+    sort: str | None,
+    min_liq: float,
+    min_vol: float,
+    max_age_h: float | None,
+    quote: str,
+    density: str,
+    screen: str | None = None,
+) -> dict:
+    tab = (tab or "").strip().lower()
+    if tab not in DISCOVER_TABS:
+        tab = "trending"
+
+    title = TABS.get(tab, "Trending")
+    note: str | None = None
+    sort_value = sort or LOCAL_TABS.get(tab) or ("age" if tab == "graduated" else "liq")
+
+    if tab == "graduated":
+        note = "Newly graduated = newest pairs first (age-sorted unless you change sort)."
+    elif tab in LOCAL_TABS:
+        note = f"From {pair_universe.stats()['pairs']:,} tracked Solana pairs, refreshed in the background."
+
+    stale = False
+    try:
+        with stage("tab_universe"):
+            universe, stale = await tab_universe(tab, quote)
+        with stage("select"):
+            try:
+                flt = compile_filter(screen) if screen and screen.strip() else None
+            except ScreenerError as e:
+                flt = None
+                note = f"Filter not applied: {e}."
+            if flt is None:
+                pairs = raw_pairs(select_pairs(universe, min_liq, min_vol, max_age_h, sort_value, TAB_PAGE_SIZE[tab]))
+            else:
+                keep = record_filter(min_liq, min_vol, max_age_h)
+                picked, _ = snapshot_of(universe, universe.records).screen(flt, sort_value, TAB_PAGE_SIZE[tab], keep)
+                pairs = raw_pairs(picked)
+    except Exception as e:
+        print(f"[token_universe] discover {tab} failed: {e!r}")
+        pairs = []
+        note = "DexScreener is unavailable right now. Try again in a moment."
+
+    return {"pairs": pairs, "q": "", "active_tab": tab, "title": title, "note": note, "tabs": TABS, "stale": stale,
+            "ui": {"sort": sort_value, "min_liq": min_liq, "min_vol": min_vol, "max_age_h": max_age_h, "quote": quote, "density": density,
+                   "filter": screen or ""}}
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match") or ""
+    return header.strip() == "*" or etag in (t.strip() for t in header.split(","))
+
+def _card_signature(p: dict) -> tuple:
+    # Everything partials/pair_grid.html reads for one card, as rendered where
+    # the output depends on more than the pair (age, avatar, sparkline).
+    base = p.get("baseToken") or {}
+    return (
+        p.get("pairAddress"), base.get("address"), base.get("symbol"),
+        (p.get("quoteToken") or {}).get("symbol"), p.get("dexId"),
+        (p.get("info") or {}).get("imageUrl") or token_avatar_url(base.get("address")),
+        age_from_ms(p.get("pairCreatedAt")),
+        p.get("priceUsd"), p.get("marketCap"), p.get("fdv"),
+        (p.get("liquidity") or {}).get("usd"), (p.get("volume") or {}).get("h24"),
+        p.get("priceChange"), (p.get("txns") or {}).get("h24"),
+        p.get("_rarity"), str(sparkline_svg(p)),
+    )
+
+def grid_etag(ctx: dict) -> str:
+    """
+    Weak ETag over everything the card grid shows, so an unchanged grid is
+    answered with 304 before any template work.
+    """
+    sig = [_card_signature(p) for p in ctx["pairs"]]
+    payload = json.dumps([sig, ctx.get("note"), ctx.get("stale")], default=str, separators=(",", ":"))
+    return 'W/"' + hashlib.blake2b(payload.encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+def render_grid(request: Request, ctx: dict) -> Response:
+    etag = grid_etag(ctx)
+    # no-cache: browsers revalidate every time and reuse their copy on 304.
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return render_template("partials/pair_grid.html", {"request": request, **ctx}, headers=headers)
+
 @app.get("/search", response_class=HTMLResponse)
 async def search_page(
     request: Request,
@@ -470,49 +695,22 @@ async def search_page(
     quote: str = "USDC",
     density: str = "comfortable",
 ):
-    query = (q or "").strip()
-    pairs = []
-    note = None
+    ctx = await search_view(q, sort, min_liq, min_vol, max_age_h, quote, density)
+    return render_template("index.html", {"request": request, **ctx})
 
-    quote_pref = [quote, "USDT", "SOL"] if quote else QUOTE_DEFAULT
-
-    if query:
-        cache_key = f"search:{query}:{quote}:{sort}:{min_liq}:{min_vol}:{max_age_h}"
-        cached = cache.get(cache_key)
-        if cached is None:
-            all_pairs = await search_pairs(query)
-            sol_pairs = solana_pairs_only(all_pairs)
-            best = dedupe_best_pair_per_token(sol_pairs, quote_pref, limit=80)
-            best = apply_filters(best, min_liq, min_vol, max_age_h)
-            best = apply_sort(best, sort)[:36]
-            best = await annotate_pairs_with_risk(best)
-            cache.set(cache_key, best, CACHE_TTL_SEARCH)
-            pairs = best
-        else:
-            pairs = cached
-    else:
-        note = "Search for any Solana meme token by symbol, name, or address."
-
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "pairs": pairs,
-            "q": query,
-            "active_tab": "search",
-            "title": "Search",
-            "note": note,
-            "tabs": TABS,
-            "ui": {
-                "sort": sort,
-                "min_liq": min_liq,
-                "min_vol": min_vol,
-                "max_age_h": max_age_h,
-                "quote": quote,
-                "density": density
-            }
-        },
-    )
+@app.get("/search/grid", response_class=HTMLResponse)
+async def search_grid(
+    request: Request,
+    q: str | None = None,
+    sort: str = "liq",
+    min_liq: float = 0,
+    min_vol: float = 0,
+    max_age_h: float | None = None,
+    quote: str = "USDC",
+    density: str = "comfortable",
+):
+    ctx = await search_view(q, sort, min_liq, min_vol, max_age_h, quote, density)
+    return render_grid(request, ctx)
 
 @app.get("/discover/{tab}", response_class=HTMLResponse)
 async def discover(
@@ -524,133 +722,159 @@ async def discover(
     max_age_h: float | None = None,
     quote: str = "USDC",
     density: str = "comfortable",
+    screen: str | None = Query(default=None, alias="filter"),
 ):
-    tab = (tab or "").strip().lower()
-    if tab not in ("trending", "graduated", "verified"):
-        tab = "trending"
+    ctx = await discover_view(tab, sort, min_liq, min_vol, max_age_h, quote, density, screen)
+    return render_template("index.html", {"request": request, **ctx})
 
-    title = TABS.get(tab, "Trending")
-    pairs: list[dict] = []
-    note: str | None = None
-    quote_pref = [quote, "USDT", "SOL"] if quote else QUOTE_DEFAULT
-    sort_value = sort or ("age" if tab == "graduated" else "liq")
-
-    cache_key = f"disc:{tab}:{quote}:{sort_value}:{min_liq}:{min_vol}:{max_age_h}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        pairs = cached
-        return templates.TemplateResponse(
-            "index.html",
-            {"request": request, "pairs": pairs, "q": "", "active_tab": tab, "title": title, "note": note, "tabs": TABS,
-             "ui": {"sort": sort_value, "min_liq": min_liq, "min_vol": min_vol, "max_age_h": max_age_h, "quote": quote, "density": density}},
-        )
-
-    if tab == "trending":
-        boosted = await fetch_top_boosted_tokens()
-        token_addrs = [x.get("tokenAddress") for x in boosted if x.get("tokenAddress")]
-        raw_pairs = await fetch_pairs_for_tokens(token_addrs)
-        sol = solana_pairs_only(raw_pairs)
-        pairs = dedupe_best_pair_per_token(sol, quote_pref, limit=120)
-        pairs = apply_filters(pairs, min_liq, min_vol, max_age_h)
-        pairs = apply_sort(pairs, sort_value)[:48]
-
-    elif tab == "graduated":
-        profiles = await fetch_latest_token_profiles()
-        token_addrs = [x.get("tokenAddress") for x in profiles if x.get("tokenAddress")]
-        raw_pairs = await fetch_pairs_for_tokens(token_addrs)
-        sol = solana_pairs_only(raw_pairs)
-        pairs = dedupe_best_pair_per_token(sol, quote_pref, limit=200)
-        pairs = apply_filters(pairs, min_liq, min_vol, max_age_h)
-        # default newest
-        pairs = apply_sort(pairs, sort_value)[:36]
-        note = "Newly graduated = newest pairs first (age-sorted unless you change sort)."
-
-    elif tab == "verified":
-        token_addrs = list(VERIFIED_TOKENS.values())
-        raw_pairs = await fetch_pairs_for_tokens(token_addrs)
-        sol = solana_pairs_only(raw_pairs)
-        pairs = dedupe_best_pair_per_token(sol, quote_pref, limit=80)
-        pairs = apply_filters(pairs, min_liq, min_vol, max_age_h)
-        pairs = apply_sort(pairs, sort_value)[:36]
-
-    pairs = await annotate_pairs_with_risk(pairs)
-
-    cache.set(cache_key, pairs, CACHE_TTL_LIST)
-
-    return templates.TemplateResponse(
-        "index.html",
-        {"request": request, "pairs": pairs, "q": "", "active_tab": tab, "title": title, "note": note, "tabs": TABS,
-         "ui": {"sort": sort_value, "min_liq": min_liq, "min_vol": min_vol, "max_age_h": max_age_h, "quote": quote, "density": density}},
-    )
+@app.get("/discover/{tab}/grid", response_class=HTMLResponse)
+async def discover_grid(
+    request: Request,
+    tab: str,
+    sort: str | None = None,
+    min_liq: float = 0,
+    min_vol: float = 0,
+    max_age_h: float | None = None,
+    quote: str = "USDC",
+    density: str = "comfortable",
+    screen: str | None = Query(default=None, alias="filter"),
+):
+    ctx = await discover_view(tab, sort, min_liq, min_vol, max_age_h, quote, density, screen)
+    return render_grid(request, ctx)
 
 @app.get("/watchlist", response_class=HTMLResponse)
 async def watchlist_page(request: Request):
-    return templates.TemplateResponse(
+    return render_template(
         "positions.html",
         {"request": request, "active_tab": "watchlist", "title": "Watchlist", "tabs": TABS},
     )
 
 @app.get("/coin/{token_address}", response_class=HTMLResponse)
 async def coin_detail(request: Request, token_address: str):
-    cache_key = f"coin:{token_address}"
-    cached = cache.get(cache_key)
-    if cached is None:
-        token_pairs = await fetch_token_pairs(token_address)
-        sol_pairs = solana_pairs_only(token_pairs)
-        sol_pairs = [decorate_pair(p) for p in sol_pairs]
-        sol_pairs = await annotate_pairs_with_risk(sol_pairs)
-        best = pick_best_pair_by_liquidity_usd(sol_pairs)
-        sol_pairs.sort(key=_liq_usd, reverse=True)
-        payload = {"pair": best, "all_pairs": sol_pairs[:25]}
-        cache.set(cache_key, payload, CACHE_TTL_TOKEN)
-    else:
-        payload = cached
+    try:
+        snap, stale = await token_snapshots.get(token_address)
+        pair, all_pairs = snap.best_raw, snap.top(25)
+    except Exception as e:
+        print(f"[token_universe] coin {token_address} failed: {e!r}")
+        pair, all_pairs, stale = None, [], False
 
-    return templates.TemplateResponse(
+    return render_template(
         "coin.html",
-        {"request": request, "token_address": token_address, "pair": payload["pair"], "all_pairs": payload["all_pairs"], "tabs": TABS},
+        {"request": request, "token_address": token_address, "pair": pair, "all_pairs": all_pairs, "tabs": TABS, "stale": stale},
     )
 
+# -------------------------
+# Generated images
+# -------------------------
+
+@app.get("/avatar/{address}.svg")
+async def avatar(request: Request, address: str):
+    svg, etag = token_avatar_svg(address.strip()[:64] or "unknown")
+    headers = {"ETag": etag, "Cache-Control": AVATAR_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(svg, media_type="image/svg+xml", headers=headers)
+
 # -------------------------
 # JSON endpoints for drawer / client pages
 # -------------------------
 
+def _watch(mints: list[str]):
+    # The crawler only runs inside the prefetch scheduler; without it nothing
+    # crawls watched tokens or ages them out of the universe.
+    if CRAWLER_ENABLED and PREFETCH_ENABLED:
+        pair_universe.watch(mints)
+
 @app.get("/api/best_pairs", response_class=JSONResponse)
 async def api_best_pairs(tokens: list[str] = Query(default=[])):
-    out: list[dict] = []
-    for addr in tokens[:60]:
-        cache_key = f"best:{addr}"
-        cached = cache.get(cache_key)
-        if cached is None:
-            token_pairs = await fetch_token_pairs(addr)
-            sol_pairs = solana_pairs_only(token_pairs)
-            sol_pairs = [decorate_pair(p) for p in sol_pairs]
-            sol_pairs = await annotate_pairs_with_risk(sol_pairs)
-            best = pick_best_pair_by_liquidity_usd(sol_pairs)
-            cache.set(cache_key, best, CACHE_TTL_TOKEN)
-            if best:
-                out.append(best)
-        else:
-            if cached:
-                out.append(cached)
-
-    out.sort(key=_liq_usd, reverse=True)
-    return out
+    _watch(tokens[:60])
+    snaps = await token_snapshots.get_many(tokens[:60])
+    out = [s.best for s in snaps.values() if s.best]
+    out.sort(key=lambda r: r.liq_usd, reverse=True)
+    return raw_pairs(out)
 
 @app.get("/api/token/{token_address}", response_class=JSONResponse)
 async def api_token(token_address: str):
-    cache_key = f"api_token:{token_address}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
-
-    token_pairs = await fetch_token_pairs(token_address)
-    sol_pairs = solana_pairs_only(token_pairs)
-    sol_pairs = [decorate_pair(p) for p in sol_pairs]
-    sol_pairs = await annotate_pairs_with_risk(sol_pairs)
-    best = pick_best_pair_by_liquidity_usd(sol_pairs)
-    sol_pairs.sort(key=_liq_usd, reverse=True)
-
-    data = {"best": best, "pairs": sol_pairs[:12]}
-    cache.set(cache_key, data, CACHE_TTL_TOKEN)
-    return data
+    try:
+        snap, stale = await token_snapshots.get(token_address)
+    except Exception as e:
+        print(f"[token_universe] api token {token_address} failed: {e!r}")
+        return {"best": None, "pairs": [], "stale": False}
+    return {"best": snap.best_raw, "pairs": snap.top(12), "stale": stale}
+
+@app.get("/api/live")
+async def api_live(pairs: list[str] = Query(default=[])):
+    """
+    Server-Sent Events stream of changed card fields for the pairs the page
+    shows, given as `token:pairAddress` (repeated `pairs=` or
+    comma-separated), as `update` events of {pairAddress: {field: value}}.
+    """
+    wanted: dict[str, str] = {}
+    for raw in pairs:
+        for item in raw.split(","):
+            token, _, pair = item.strip().partition(":")
+            if token and pair:
+                wanted[pair] = token
+    if not wanted:
+        return JSONResponse({"error": "no pairs"}, status_code=400)
+    _watch(list(dict.fromkeys(wanted.values())))
+    return StreamingResponse(
+        live_hub.stream(wanted),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/screener", response_class=JSONResponse)
+async def api_screener(
+    q: str = "",
+    sort: str = "liq",
+    limit: int = 50,
+):
+    """
+    Pairs from the crawled universe matching filter expression `q`, e.g.
+    `liq > 50k and h24 between 0 and 100 and risk <= 55 and txns > 500`
+    (fields: liq, vol, mcap, price, txns, h1, h6, h24, age in hours, risk).
+    An empty `q` matches everything. Mintable and freezable tokens are
+    left out, as they are on the pages.
+    """
+    try:
+        flt = compile_filter(q) if q.strip() else None
+    except ScreenerError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    with stage("snapshot"):
+        snap, _ = await screener_snapshot()
+    started = time.perf_counter()
+    with stage("screen"):
+        limit = max(0, min(limit, SCREENER_MAX_LIMIT))
+        if flt is None:
+            picked, matched = snap.select(snap.all_rows, sort, limit), len(snap)
+        else:
+            picked, matched = snap.screen(flt, sort, limit)
+    return {
+        "q": flt.text if flt else "",
+        "sort": sort_name(sort),
+        "universe": len(snap),
+        "matched": matched,
+        "snapshot_age": round(time.time() - snap.built_at, 1),
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+        "pairs": raw_pairs(picked),
+    }
+
+@app.get("/api/status", response_class=JSONResponse)
+async def api_status():
+    return {
+        "upstreams": limiter_stats(),
+        "breakers": breakers.stats(),
+        "cache": cache.stats(),
+        "prefetch": scheduler.status(),
+        "search_index": search_index.stats(),
+        "price_history": price_history.stats(),
+        "live": live_hub.stats(),
+        "crawler": crawler.stats(),
+        "stages": stage_stats(),
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,92 @@
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+FAILURE_THRESHOLD = 5           # consecutive failures before the circuit opens
+RESET_TIMEOUT_SECONDS = 30      # how long it stays open before one probe is let through
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling an upstream that is known to be failing."""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker. Closed: calls go through and consecutive
+    failures are counted. Open: calls fail fast with CircuitOpenError until
+    `reset_timeout` has passed. Half-open: a single probe call is allowed;
+    its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+        self.opened = 0
+        self.rejected = 0
+
+    def before_call(self):
+        if self.state == CLOSED:
+            return
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(f"circuit open for {self.name}")
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.opened += 1
+                print(f"[token_universe] circuit opened for {self.name} after {self.failures} failures")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def abandon(self):
+        # The call never finished (e.g. the caller was cancelled); let another probe through.
+        self._probing = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class Breakers:
+    def __init__(self):
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker(endpoint)
+        return breaker
+
+    def stats(self) -> dict[str, dict]:
+        return {name: b.stats() for name, b in sorted(self._breakers.items())}
+
+
+breakers = Breakers()
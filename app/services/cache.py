@@ -1,21 +1,184 @@
+import asyncio
+import sys
 import time
+from collections import OrderedDict
+from typing import Any
+
+from app.settings import CACHE_MAX_BYTES, CACHE_MAX_ENTRIES
+
+SWEEP_INTERVAL_SECONDS = 30
+_SIZE_MAX_DEPTH = 6
+
+
+def namespace_of(key: str) -> str:
+    # "dex:token:abc" -> "dex", "tokens" -> "tokens"
+    return key.split(":", 1)[0]
+
+
+def approx_size(value: Any, _depth: int = 0) -> int:
+    """
+    Rough byte estimate for JSON-like values. Good enough to enforce a memory
+    budget; not an exact accounting of the interpreter's allocations. Other
+    objects are measured with sys.getsizeof, so cached types that hold a
+    payload (PairRecord, SortedUniverse, ...) report it from __sizeof__.
+    """
+    size = sys.getsizeof(value)
+    if _depth >= _SIZE_MAX_DEPTH:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += sys.getsizeof(k) + approx_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            size += approx_size(v, _depth + 1)
+    return size
+
+
+class NamespaceStats:
+    __slots__ = ("hits", "stale_hits", "misses", "evictions", "expirations", "entries", "bytes")
 
-class TTLCache:
     def __init__(self):
-        self.store = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.entries = 0
+        self.bytes = 0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class CacheEntry:
+    __slots__ = ("value", "fresh_until", "expires_at", "size", "refresh_failed")
+
+    def __init__(self, value: Any, fresh_until: float, expires_at: float, size: int):
+        self.value = value
+        self.fresh_until = fresh_until      # soft TTL: served as-is until here
+        self.expires_at = expires_at        # hard TTL: servable as stale until here
+        self.size = size
+        self.refresh_failed = False
+
+    @property
+    def stale(self) -> bool:
+        return time.time() >= self.fresh_until
+
+
+class TTLCache:
+    """
+    In-process TTL cache bounded by entry count and an approximate byte budget.
+    Least recently used entries are evicted first; expired entries are dropped
+    on read and by periodic sweeps.
 
-    def get(self, key):
-        entry = self.store.get(key)
-        if not entry:
+    Entries have a soft TTL (`ttl_seconds`) and an optional stale window
+    (`stale_seconds`) after it. `get` only returns fresh values; `get_entry`
+    also returns stale ones so callers can serve them while revalidating.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._store: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._stats: dict[str, NamespaceStats] = {}
+
+    def _ns(self, key: str) -> NamespaceStats:
+        ns = namespace_of(key)
+        stats = self._stats.get(ns)
+        if stats is None:
+            stats = self._stats[ns] = NamespaceStats()
+        return stats
+
+    def _remove(self, key: str) -> NamespaceStats | None:
+        entry = self._store.pop(key, None)
+        if entry is None:
+            return None
+        self._bytes -= entry.size
+        stats = self._ns(key)
+        stats.entries -= 1
+        stats.bytes -= entry.size
+        return stats
+
+    def _lookup(self, key: str) -> CacheEntry | None:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        if time.time() >= entry.expires_at:
+            self._remove(key).expirations += 1
             return None
-        value, expires_at = entry
-        if time.time() > expires_at:
-            del self.store[key]
+        self._store.move_to_end(key)
+        return entry
+
+    def get(self, key: str) -> Any | None:
+        entry = self._lookup(key)
+        if entry is None or time.time() >= entry.fresh_until:
+            self._ns(key).misses += 1
             return None
-        return value
+        self._ns(key).hits += 1
+        return entry.value
+
+    def get_entry(self, key: str) -> CacheEntry | None:
+        """Fresh or stale entry (within its hard TTL), or None."""
+        entry = self._lookup(key)
+        stats = self._ns(key)
+        if entry is None:
+            stats.misses += 1
+        elif time.time() >= entry.fresh_until:
+            stats.stale_hits += 1
+        else:
+            stats.hits += 1
+        return entry
+
+    def set(self, key: str, value: Any, ttl_seconds: float, stale_seconds: float = 0, size: int | None = None):
+        """Stores `value`; `size` overrides the approx_size estimate of its bytes."""
+        self._remove(key)
+        size = approx_size(value) if size is None else size
+        if size > self.max_bytes:
+            # Would flush the whole cache and still not fit.
+            return
+        fresh_until = time.time() + ttl_seconds
+        self._store[key] = CacheEntry(value, fresh_until, fresh_until + stale_seconds, size)
+        self._bytes += size
+        stats = self._ns(key)
+        stats.entries += 1
+        stats.bytes += size
+        self._evict()
+
+    def mark_refresh_failed(self, key: str):
+        entry = self._store.get(key)
+        if entry is not None:
+            entry.refresh_failed = True
+
+    def delete(self, key: str):
+        self._remove(key)
+
+    def _evict(self):
+        while self._store and (len(self._store) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._store))
+            self._remove(oldest).evictions += 1
+
+    def sweep(self) -> int:
+        now = time.time()
+        expired = [k for k, e in self._store.items() if now >= e.expires_at]
+        for key in expired:
+            self._remove(key).expirations += 1
+        return len(expired)
+
+    async def run_sweeper(self, interval: float = SWEEP_INTERVAL_SECONDS):
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+
+    def stats(self) -> dict[str, dict]:
+        return {ns: s.as_dict() for ns, s in sorted(self._stats.items())}
+
+    def __len__(self) -> int:
+        return len(self._store)
 
-    def set(self, key, value, ttl):
-        self.store[key] = (value, time.time() + ttl)
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
 
 
 cache = TTLCache()
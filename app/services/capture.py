@@ -0,0 +1,199 @@
+import asyncio
+import base64
+import gzip
+import json
+import time
+from collections import Counter
+
+import httpx
+
+FLUSH_EVERY = 50                # records between flushes to disk
+KEPT_HEADERS = ("content-type", "retry-after")
+
+
+def _request_key(method: str, url: str, body: bytes) -> str:
+    # RPC calls all share one URL; the JSON-RPC payload tells them apart.
+    return f"{method} {url} {body.decode('utf-8', 'replace')}" if body else f"{method} {url}"
+
+
+class CaptureWriter:
+    """
+    Append-only gzip NDJSON log of upstream exchanges, one JSON object per
+    line: {ts, ms, service, method, url, req, status, headers, body}.
+    Each run appends a new gzip member to the same file, which gzip readers
+    treat as one stream. Flushed every FLUSH_EVERY records and on close, so
+    a crash loses at most the unflushed tail.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: gzip.GzipFile | None = None
+        self._pending = 0
+        self.records = 0
+
+    def write(self, record: dict):
+        if self._file is None:
+            self._file = gzip.open(self.path, "ab")
+        self._file.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+        self.records += 1
+        self._pending += 1
+        if self._pending >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if self._file is not None and self._pending:
+            self._file.flush()
+            self._pending = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._pending = 0
+
+
+def read_capture(path: str) -> list[dict]:
+    """Records from a capture file, oldest first; a truncated tail is ignored."""
+    records = []
+    with gzip.open(path, "rb") as f:
+        try:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+        except (EOFError, gzip.BadGzipFile):
+            pass
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+class CaptureTransport(httpx.AsyncBaseTransport):
+    """Passes requests to `inner` and logs every response, with its timing, to `writer`."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, writer: CaptureWriter, service: str):
+        self._inner = inner
+        self._writer = writer
+        self._service = service
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        ts = time.time()
+        started = time.perf_counter()
+        response = await self._inner.handle_async_request(request)
+        body = await response.aread()
+        record = {
+            "ts": round(ts, 3),
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+            "service": self._service,
+            "method": request.method,
+            "url": str(request.url),
+            "req": request.content.decode("utf-8", "replace") if request.content else None,
+            "status": response.status_code,
+            "headers": {k: response.headers[k] for k in KEPT_HEADERS if k in response.headers},
+        }
+        try:
+            record["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            record["body_b64"] = base64.b64encode(body).decode("ascii")
+        try:
+            self._writer.write(record)
+        except OSError as e:
+            print(f"[token_universe] capture write failed: {e!r}")
+        return response
+
+    async def aclose(self):
+        await self._inner.aclose()
+        self._writer.flush()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Serves upstream responses from a capture file instead of the network.
+    Requests are matched on method, URL and body. When a request was
+    captured several times, replay follows the capture's timeline: it serves
+    the latest response captured at or before the current replay time, with
+    replay time running `speed` times faster than the capture did. Each
+    response is delayed by its captured latency divided by `speed`.
+    `speed=0` ignores both: responses cycle in capture order, undelayed.
+    Unmatched requests get a 404.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self._records: dict[str, list[dict]] = {}
+        records = read_capture(path)
+        self._t0 = records[0]["ts"] if records else 0.0
+        for r in records:
+            key = _request_key(r["method"], r["url"], (r.get("req") or "").encode("utf-8"))
+            self._records.setdefault(key, []).append(r)
+        self._cursor: Counter[str] = Counter()
+        self._started: float | None = None
+        self.calls: Counter[str] = Counter()
+        self.misses = 0
+
+    def _pick(self, key: str, entries: list[dict]) -> dict:
+        if not self.speed:
+            i = self._cursor[key] % len(entries)
+            self._cursor[key] += 1
+            return entries[i]
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+        replay_ts = self._t0 + (now - self._started) * self.speed
+        chosen = entries[0]
+        for r in entries:
+            if r["ts"] > replay_ts:
+                break
+            chosen = r
+        return chosen
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = _request_key(request.method, str(request.url), request.content)
+        entries = self._records.get(key)
+        if not entries:
+            self.misses += 1
+            return httpx.Response(404, json={"error": "not in capture"}, request=request)
+
+        record = self._pick(key, entries)
+        self.calls[record.get("service") or "unknown"] += 1
+        if self.speed and record.get("ms"):
+            await asyncio.sleep(record["ms"] / 1000 / self.speed)
+        if "body_b64" in record:
+            content = base64.b64decode(record["body_b64"])
+        else:
+            content = record.get("body", "").encode("utf-8")
+        return httpx.Response(record["status"], headers=record.get("headers") or {}, content=content, request=request)
+
+    def mints(self) -> list[str]:
+        """Base token addresses seen in captured pair payloads, most frequently seen first."""
+        seen: Counter[str] = Counter()
+
+        def walk(value):
+            if isinstance(value, dict):
+                base = value.get("baseToken")
+                if isinstance(base, dict) and base.get("address"):
+                    seen[base["address"]] += 1
+                else:
+                    for v in value.values():
+                        walk(v)
+            elif isinstance(value, list):
+                for v in value:
+                    walk(v)
+
+        for entries in self._records.values():
+            for r in entries:
+                if r.get("service") == "dexscreener" and r.get("body"):
+                    try:
+                        walk(json.loads(r["body"]))
+                    except ValueError:
+                        continue
+        return [m for m, _ in seen.most_common()]
+
+    def stats(self) -> dict:
+        return {
+            "requests": sum(len(v) for v in self._records.values()),
+            "distinct": len(self._records),
+            "served": dict(self.calls),
+            "misses": self.misses,
+        }
@@ -0,0 +1,52 @@
+import time
+
+from app.services.dexscreener import solana_pairs_only
+from app.services.dexscreener_discovery import fetch_pairs_by_token, merge_pairs
+from app.services.ingest import ingest_pairs
+from app.services.pair_universe import PairUniverse, pair_universe
+from app.services.pairs import to_records
+from app.settings import CRAWLER_TOKENS_PER_TICK
+
+
+class Crawler:
+    """
+    Incremental refresh of the pair universe, one batch per tick: the most
+    overdue tokens are fetched through tokens/v1 (30 per request, via the
+    shared per-address pair cache), fed through ingest_pairs like any other
+    fetch, and the result replaces what the universe held for them. Failed
+    tokens back off; dead pairs and long-unseen tokens are aged out.
+    Meant to run as a prefetch job, i.e. at background priority.
+    """
+
+    def __init__(self, universe: PairUniverse, tokens_per_tick: int = CRAWLER_TOKENS_PER_TICK):
+        self.universe = universe
+        self.tokens_per_tick = tokens_per_tick
+        self.ticks = 0
+        self.refreshed = 0
+        self.last_tick_at: float | None = None
+        self.last_batch = 0
+
+    async def tick(self):
+        due = self.universe.due(self.tokens_per_tick)
+        self.last_batch = len(due)
+        if due:
+            by_token, failed = await fetch_pairs_by_token(due, max_age=0)
+            records = ingest_pairs(to_records(solana_pairs_only(merge_pairs(by_token.values()))))
+            self.universe.settle(list(by_token), records)
+            self.universe.failed(failed)
+            self.refreshed += len(by_token)
+        self.universe.age_out()
+        self.ticks += 1
+        self.last_tick_at = time.time()
+
+    def stats(self) -> dict:
+        return {
+            **self.universe.stats(),
+            "ticks": self.ticks,
+            "refreshed": self.refreshed,
+            "last_batch": self.last_batch,
+            "last_tick_at": self.last_tick_at,
+        }
+
+
+crawler = Crawler(pair_universe)
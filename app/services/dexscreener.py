@@ -1,56 +1,51 @@
-import httpx
 from app.services.cache import cache
+from app.services.http import request
+from app.services.singleflight import load_swr
 
 DEX_BASE = "https://api.dexscreener.com/latest/dex"
 TTL_SECONDS = 20  # short TTL; keeps UI snappy without hammering API
+STALE_SECONDS = 600  # last-known-good window served while revalidating / during outages
 
 
-async def search_pairs(query: str) -> list[dict]:
+async def _search_upstream(q: str) -> list[dict]:
+    resp = await request("dexscreener", "GET", f"{DEX_BASE}/search", endpoint="dexscreener:search", params={"q": q})
+    resp.raise_for_status()
+    data = resp.json()
+    return data.get("pairs", []) or []
+
+
+async def search_pairs_checked(query: str) -> tuple[list[dict], bool]:
+    """
+    DexScreener search results, plus whether they are last-known-good data
+    served because DexScreener failed; raises when there is none, so a
+    failed search is never mistaken for an empty one.
+    """
     q = (query or "").strip()
     if not q:
-        return []
+        return [], False
 
     cache_key = f"dex:search:{q.lower()}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
+    return await load_swr(cache, cache_key, TTL_SECONDS, STALE_SECONDS, lambda: _search_upstream(q))
 
-    try:
-        async with httpx.AsyncClient(timeout=12) as client:
-            resp = await client.get(f"{DEX_BASE}/search", params={"q": q})
-            resp.raise_for_status()
-            data = resp.json()
-            pairs = data.get("pairs", []) or []
-    except Exception as e:
-        print(f"[token_universe] DexScreener search failed: {e!r}")
-        pairs = []
 
-    cache.set(cache_key, pairs, TTL_SECONDS)
-    return pairs
+async def _token_pairs_upstream(addr: str) -> list[dict]:
+    resp = await request("dexscreener", "GET", f"{DEX_BASE}/tokens/{addr}", endpoint="dexscreener:tokens")
+    resp.raise_for_status()
+    data = resp.json()
+    return data.get("pairs", []) or []
 
 
-async def fetch_token_pairs(token_address: str) -> list[dict]:
+async def fetch_token_pairs_checked(token_address: str) -> tuple[list[dict], bool]:
+    """
+    All pairs for a token, plus whether they are last-known-good data served
+    because DexScreener failed; raises when there is none.
+    """
     addr = (token_address or "").strip()
     if not addr:
-        return []
+        return [], False
 
     cache_key = f"dex:token:{addr}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
-
-    try:
-        async with httpx.AsyncClient(timeout=12) as client:
-            resp = await client.get(f"{DEX_BASE}/tokens/{addr}")
-            resp.raise_for_status()
-            data = resp.json()
-            pairs = data.get("pairs", []) or []
-    except Exception as e:
-        print(f"[token_universe] DexScreener token fetch failed: {e!r}")
-        pairs = []
-
-    cache.set(cache_key, pairs, TTL_SECONDS)
-    return pairs
+    return await load_swr(cache, cache_key, TTL_SECONDS, STALE_SECONDS, lambda: _token_pairs_upstream(addr))
 
 
 def solana_pairs_only(pairs: list[dict]) -> list[dict]:
@@ -1,11 +1,30 @@
-import httpx
+import asyncio
+import time
+
+from app.services.breaker import UpstreamUnavailable
 from app.services.cache import cache
+from app.services.http import request
+from app.services.ratelimit import SharedPriority, share_priority, with_priority
+from app.services.singleflight import load_swr, refresh_cached
+from app.services.timing import timed
 
 DEX_BASE = "https://api.dexscreener.com"
 CHAIN = "solana"
 
 PROFILES_TTL_SECONDS = 60
 BOOSTS_TTL_SECONDS = 60
+# Boosts/profiles change slowly; keep serving the last good list for a while
+# if DexScreener is down rather than failing the whole tab.
+DISCOVERY_STALE_SECONDS = 30 * 60
+
+TOKENS_PER_REQUEST = 30         # tokens/v1 accepts up to 30 addresses
+PAIRS_CONCURRENCY = 4           # chunk requests in flight per call
+PAIRS_TTL_SECONDS = 15          # per-address pair lists (dex:tokpairs:{addr})
+
+# address -> the chunk fetch currently loading it, so concurrent callers with
+# overlapping address lists share one upstream request per address. Joining
+# a fetch promotes it to the joiner's priority.
+_pending: dict[str, tuple[asyncio.Future, SharedPriority]] = {}
 
 
 def _normalize_list(data):
@@ -28,68 +47,168 @@ def _normalize_list(data):
     return []
 
 
-async def fetch_latest_token_profiles():
-    """
-    Official endpoint:
-      GET https://api.dexscreener.com/token-profiles/latest/v1
-    """
-    cache_key = "dex:profiles:latest"
-    cached = cache.get(cache_key)
-    if cached:
-        return cached
-
+async def _latest_profiles_upstream():
     url = f"{DEX_BASE}/token-profiles/latest/v1"
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        data = resp.json()
+    resp = await request("dexscreener", "GET", url, limit="dexscreener_profiles", endpoint="dexscreener:profiles", timeout=15)
+    resp.raise_for_status()
+    data = resp.json()
 
     items = _normalize_list(data)
     # filter to Solana profiles only
-    sol = [x for x in items if str(x.get("chainId", "")).lower() == CHAIN]
-    cache.set(cache_key, sol, PROFILES_TTL_SECONDS)
-    return sol
+    return [x for x in items if str(x.get("chainId", "")).lower() == CHAIN]
 
 
-async def fetch_top_boosted_tokens():
+@timed("profiles")
+async def fetch_latest_token_profiles():
     """
     Official endpoint:
-      GET https://api.dexscreener.com/token-boosts/top/v1
+      GET https://api.dexscreener.com/token-profiles/latest/v1
+    Serves the last good list for up to DISCOVERY_STALE_SECONDS if the
+    endpoint fails; raises only when there is nothing to fall back to.
     """
-    cache_key = "dex:boosts:top"
-    cached = cache.get(cache_key)
-    if cached:
-        return cached
+    sol, _ = await load_swr(cache, "dex:profiles:latest", PROFILES_TTL_SECONDS, DISCOVERY_STALE_SECONDS, _latest_profiles_upstream)
+    return sol
 
+
+async def refresh_latest_token_profiles():
+    return await refresh_cached(cache, "dex:profiles:latest", PROFILES_TTL_SECONDS, DISCOVERY_STALE_SECONDS, _latest_profiles_upstream)
+
+
+async def _top_boosts_upstream():
     url = f"{DEX_BASE}/token-boosts/top/v1"
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        data = resp.json()
+    resp = await request("dexscreener", "GET", url, limit="dexscreener_profiles", endpoint="dexscreener:boosts", timeout=15)
+    resp.raise_for_status()
+    data = resp.json()
 
     items = _normalize_list(data)
-    sol = [x for x in items if str(x.get("chainId", "")).lower() == CHAIN]
-    cache.set(cache_key, sol, BOOSTS_TTL_SECONDS)
-    return sol
+    return [x for x in items if str(x.get("chainId", "")).lower() == CHAIN]
 
 
-async def fetch_pairs_for_tokens(token_addresses: list[str]):
+@timed("boosts")
+async def fetch_top_boosted_tokens():
     """
     Official endpoint:
-      GET https://api.dexscreener.com/tokens/v1/{chainId}/{tokenAddresses}
-    tokenAddresses: comma-separated, up to 30 per request
+      GET https://api.dexscreener.com/token-boosts/top/v1
+    Serves the last good list for up to DISCOVERY_STALE_SECONDS if the
+    endpoint fails; raises only when there is nothing to fall back to.
     """
-    token_addresses = [t for t in token_addresses if t]
-    token_addresses = token_addresses[:30]
-    if not token_addresses:
-        return []
+    sol, _ = await load_swr(cache, "dex:boosts:top", BOOSTS_TTL_SECONDS, DISCOVERY_STALE_SECONDS, _top_boosts_upstream)
+    return sol
+
+
+async def refresh_top_boosted_tokens():
+    return await refresh_cached(cache, "dex:boosts:top", BOOSTS_TTL_SECONDS, DISCOVERY_STALE_SECONDS, _top_boosts_upstream)
 
+
+async def _pairs_for_tokens_upstream(token_addresses: list[str]):
     joined = ",".join(token_addresses)
     url = f"{DEX_BASE}/tokens/v1/{CHAIN}/{joined}"
 
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        data = resp.json()
+    resp = await request("dexscreener", "GET", url, endpoint="dexscreener:tokens_v1", timeout=20)
+    resp.raise_for_status()
+    data = resp.json()
 
     return _normalize_list(data)
+
+
+def merge_pairs(lists) -> list[dict]:
+    """Concatenates pair lists, keeping the first copy of each pair address."""
+    seen: dict = {}
+    for pairs in lists:
+        for p in pairs:
+            seen.setdefault(p.get("pairAddress") or id(p), p)
+    return list(seen.values())
+
+
+async def _fetch_chunk(chunk: list[str], sem: asyncio.Semaphore) -> dict[str, list[dict]]:
+    async with sem:
+        # Not negatively cached: chunk composition differs from call to call,
+        # so a per-chunk key would rarely be hit again and would only block
+        # the other addresses in it. The endpoint's circuit breaker fails
+        # fast while tokens/v1 is down.
+        pairs = await _pairs_for_tokens_upstream(chunk)
+
+    by_token: dict[str, list[dict]] = {addr: [] for addr in chunk}
+    for p in pairs:
+        for side in ("baseToken", "quoteToken"):
+            addr = (p.get(side) or {}).get("address")
+            if addr in by_token:
+                by_token[addr].append(p)
+    now = time.time()
+    for addr, token_pairs in by_token.items():
+        cache.set(f"dex:tokpairs:{addr}", (now, token_pairs), PAIRS_TTL_SECONDS)
+    return by_token
+
+
+def _forget(chunk: list[str], task: asyncio.Future):
+    for addr in chunk:
+        if addr in _pending and _pending[addr][0] is task:
+            del _pending[addr]
+    if not task.cancelled():
+        task.exception()    # retrieved here so an unawaited failure isn't logged
+
+
+async def fetch_pairs_by_token(
+    token_addresses: list[str], max_age: float = PAIRS_TTL_SECONDS
+) -> tuple[dict[str, list[dict]], list[str]]:
+    """
+    Pairs for any number of token addresses, keyed by address, plus the
+    addresses whose fetch failed. Each address's pairs are cached for
+    PAIRS_TTL_SECONDS and reused when younger than `max_age`; addresses
+    another call is already loading are awaited rather than re-requested.
+    The rest go out in 30-address chunks, PAIRS_CONCURRENCY at a time.
+    """
+    found: dict[str, list[dict]] = {}
+    waits: dict[asyncio.Future, list[str]] = {}
+    to_fetch: list[str] = []
+    now = time.time()
+    for addr in dict.fromkeys(t for t in token_addresses if t):
+        hit = cache.get(f"dex:tokpairs:{addr}")
+        if hit is not None and now - hit[0] < max_age:
+            found[addr] = hit[1]
+        elif addr in _pending:
+            task, shared = _pending[addr]
+            share_priority(shared)
+            waits.setdefault(task, []).append(addr)
+        else:
+            to_fetch.append(addr)
+
+    sem = asyncio.Semaphore(PAIRS_CONCURRENCY)
+    for i in range(0, len(to_fetch), TOKENS_PER_REQUEST):
+        chunk = to_fetch[i:i + TOKENS_PER_REQUEST]
+        shared = share_priority()
+        task = asyncio.ensure_future(with_priority(shared, _fetch_chunk(chunk, sem)))
+        task.add_done_callback(lambda t, c=chunk: _forget(c, t))
+        for addr in chunk:
+            _pending[addr] = (task, shared)
+        waits[task] = chunk
+
+    failed: list[str] = []
+    if waits:
+        # Shielded: a cancelled caller must not cancel chunks other callers share.
+        results = await asyncio.gather(*(asyncio.shield(t) for t in waits), return_exceptions=True)
+        for (task, addrs), res in zip(waits.items(), results):
+            if isinstance(res, Exception):
+                print(f"[token_universe] pairs fetch failed for {len(addrs)} tokens: {res!r}")
+                failed.extend(addrs)
+                continue
+            for addr in addrs:
+                found[addr] = res.get(addr, [])
+    return found, failed
+
+
+@timed("pairs_for_tokens")
+async def fetch_pairs_for_tokens(token_addresses: list[str], max_age: float = PAIRS_TTL_SECONDS) -> list[dict]:
+    """
+    Official endpoint:
+      GET https://api.dexscreener.com/tokens/v1/{chainId}/{tokenAddresses}
+    tokenAddresses: comma-separated, up to 30 per request
+
+    Merged, deduped pairs for any number of addresses (see
+    fetch_pairs_by_token). Chunks that fail are left out; raises only when
+    every address failed.
+    """
+    found, failed = await fetch_pairs_by_token(token_addresses, max_age)
+    if failed and not found:
+        raise UpstreamUnavailable(f"pairs fetch failed for all {len(failed)} tokens")
+    return merge_pairs(found.values())
@@ -0,0 +1,180 @@
+import asyncio
+import email.utils
+import time
+
+import httpx
+from app.services.breaker import breakers
+from app.services.capture import CaptureTransport, CaptureWriter, ReplayTransport
+from app.services.metrics import observe_upstream
+from app.services.ratelimit import BACKGROUND, current_priority, limiters
+from app.services.timing import stage
+from app.settings import CAPTURE_PATH, HTTP2_ENABLED, REPLAY_PATH, REPLAY_SPEED
+
+try:
+    import h2  # noqa: F401  (optional: pip install "httpx[http2]")
+    _H2_AVAILABLE = True
+except ImportError:
+    _H2_AVAILABLE = False
+
+# One pooled client per upstream service. Each service talks to a single host,
+# so its pool doubles as the per-host keep-alive pool.
+SERVICE_CONFIG = {
+    "dexscreener": {"timeout": 12, "max_connections": 32, "max_keepalive": 16},
+    "solana_rpc": {"timeout": 12, "max_connections": 16, "max_keepalive": 8},
+    "jupiter": {"timeout": 10, "max_connections": 8, "max_keepalive": 4},
+}
+KEEPALIVE_EXPIRY_SECONDS = 30
+
+# 429 handling: retry after Retry-After (or exponential backoff without one),
+# but never keep a page request waiting longer than MAX_RETRY_WAIT_INTERACTIVE.
+MAX_429_RETRIES = 2
+BACKOFF_BASE_SECONDS = 1.0
+MAX_RETRY_WAIT_INTERACTIVE = 5.0
+MAX_RETRY_WAIT_BACKGROUND = 60.0
+
+
+class HttpClients:
+    def __init__(self, config: dict[str, dict]):
+        self._config = config
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        # When set, every service's client sends through this transport instead
+        # of the network (benchmarks, replayed captures).
+        self.transport: httpx.AsyncBaseTransport | None = None
+        self.capture: CaptureWriter | None = None
+
+    def _build(self, service: str) -> httpx.AsyncClient:
+        cfg = self._config[service]
+        limits = httpx.Limits(
+            max_connections=cfg["max_connections"],
+            max_keepalive_connections=cfg["max_keepalive"],
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        )
+        http2 = HTTP2_ENABLED and _H2_AVAILABLE
+        if self.transport is None and REPLAY_PATH:
+            self.transport = ReplayTransport(REPLAY_PATH, REPLAY_SPEED)
+            print(f"[token_universe] replaying upstream traffic from {REPLAY_PATH} at {REPLAY_SPEED}x")
+        transport = self.transport
+        if transport is None and CAPTURE_PATH:
+            if self.capture is None:
+                self.capture = CaptureWriter(CAPTURE_PATH)
+                print(f"[token_universe] capturing upstream traffic to {CAPTURE_PATH}")
+            transport = CaptureTransport(httpx.AsyncHTTPTransport(limits=limits, http2=http2), self.capture, service)
+        return httpx.AsyncClient(
+            timeout=cfg["timeout"],
+            limits=limits,
+            http2=http2,
+            transport=transport,
+        )
+
+    def use_transport(self, transport: httpx.AsyncBaseTransport | None):
+        """Route all services through `transport`; call before any client is opened."""
+        self.transport = transport
+        self._clients = {}
+
+    def open(self):
+        for service in self._config:
+            self.get(service)
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        # Lazily (re)created so scripts and tests that skip the app lifespan still work.
+        client = self._clients.get(service)
+        if client is None or client.is_closed:
+            client = self._build(service)
+            self._clients[service] = client
+        return client
+
+    async def aclose(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                print(f"[token_universe] http client close failed: {e!r}")
+        if self.capture is not None:
+            self.capture.close()
+
+
+http_clients = HttpClients(SERVICE_CONFIG)
+
+
+def get_client(service: str) -> httpx.AsyncClient:
+    return http_clients.get(service)
+
+
+def retry_after_seconds(resp: httpx.Response) -> float | None:
+    value = resp.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+async def request(
+    service: str,
+    method: str,
+    url: str,
+    *,
+    limit: str | None = None,
+    endpoint: str | None = None,
+    **kwargs,
+) -> httpx.Response:
+    """
+    Rate-limited, circuit-broken upstream call.
+
+    Fails fast with CircuitOpenError while the `endpoint` breaker (default:
+    the service) is open. Otherwise waits for a token from the `limit` bucket
+    (default: the service's own) at the current task's priority. On 429 the
+    bucket is paused for Retry-After so every queued caller backs off, then
+    the call is retried. Failed requests, 5xx and a final 429 count as
+    breaker failures; the final response is returned as-is for the caller
+    to raise_for_status().
+    """
+    limiter = limiters[limit or service]
+    breaker = breakers.get(endpoint or service)
+    client = get_client(service)
+    max_wait = MAX_RETRY_WAIT_BACKGROUND if current_priority() == BACKGROUND else MAX_RETRY_WAIT_INTERACTIVE
+
+    breaker.before_call()
+    attempt = 0
+    try:
+        while True:
+            with stage("ratelimit_wait"):
+                await limiter.acquire()
+            started = time.perf_counter()
+            try:
+                with stage("upstream." + breaker.name):
+                    resp = await client.request(method, url, **kwargs)
+            except Exception:
+                # Transport errors, but also e.g. a body that fails to decode.
+                observe_upstream(breaker.name, "error", time.perf_counter() - started)
+                breaker.record_failure()
+                raise
+            observe_upstream(breaker.name, resp.status_code, time.perf_counter() - started)
+            if resp.status_code != 429:
+                if resp.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                return resp
+
+            delay = retry_after_seconds(resp)
+            if delay is None:
+                delay = BACKOFF_BASE_SECONDS * (2 ** attempt)
+            limiter.pause(delay)
+            print(f"[token_universe] {limiter.name} rate limited (429), backing off {delay:.1f}s")
+            if attempt >= MAX_429_RETRIES or delay > max_wait:
+                breaker.record_failure()
+                return resp
+            attempt += 1
+            await asyncio.sleep(delay)
+    except BaseException:
+        # Whatever ended the call, never leave a half-open probe outstanding;
+        # failures were already recorded above.
+        breaker.abandon()
+        raise
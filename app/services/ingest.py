@@ -0,0 +1,15 @@
+from app.services.pair_universe import pair_universe
+from app.services.pairs import PairRecord
+from app.services.price_history import price_history
+from app.services.search_index import search_index
+
+
+def ingest_pairs(records: list[PairRecord]) -> list[PairRecord]:
+    """
+    Single entry point for freshly fetched pairs: feeds the in-process
+    indexes and hands the records back so callers can chain it.
+    """
+    search_index.add(records)
+    pair_universe.add(records)
+    price_history.record(records)
+    return records
@@ -1,4 +1,3 @@
-import httpx
 from app.settings import (
     JUPITER_BASE_URL,
     TOKEN_LIST_URL,
@@ -6,6 +5,7 @@ from app.settings import (
     TOKEN_LIST_TTL_SECONDS
 )
 from app.services.cache import cache
+from app.services.http import request
 
 SOL_MINT = "So11111111111111111111111111111111111111112"
 LAMPORTS_PER_SOL = 1_000_000_000
@@ -23,10 +23,9 @@ async def fetch_tokens():
         return cached
 
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(TOKEN_LIST_URL)
-            resp.raise_for_status()
-            tokens = resp.json()
+        resp = await request("jupiter", "GET", TOKEN_LIST_URL, endpoint="jupiter:tokens")
+        resp.raise_for_status()
+        tokens = resp.json()
     except Exception as e:
         # Never crash the site because a 3rd-party endpoint / DNS is down
         print(f"[token_universe] fetch_tokens failed: {e!r}")
@@ -54,10 +53,9 @@ async def fetch_price_in_sol(output_mint: str):
     }
 
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(f"{JUPITER_BASE_URL}/quote", params=params)
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await request("jupiter", "GET", f"{JUPITER_BASE_URL}/quote", endpoint="jupiter:quote", params=params)
+        resp.raise_for_status()
+        data = resp.json()
     except Exception as e:
         # Quote failures are common for illiquid/blocked tokens; don't crash the page
         print(f"[token_universe] fetch_price_in_sol failed for {output_mint}: {e!r}")
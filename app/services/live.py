@@ -0,0 +1,145 @@
+import asyncio
+import json
+from typing import AsyncIterator
+
+from app.services.pairs import PairRecord
+from app.services.ratelimit import mark_background
+from app.services.token_snapshots import TokenSnapshotService
+from app.settings import LIVE_MAX_TOKENS, LIVE_POLL_SECONDS
+
+HEARTBEAT_SECONDS = 15
+RECONNECT_MS = 5000
+
+
+def live_fields(r: PairRecord) -> dict:
+    """The card fields pushed to clients for one pair."""
+    pc = r.raw.get("priceChange") or {}
+    txns = (r.raw.get("txns") or {}).get("h24") or {}
+    return {
+        "priceUsd": r.price_usd,
+        "mcap": r.mcap,
+        "liq": r.liq_usd,
+        "vol": r.vol24,
+        "h1": pc.get("h1"),
+        "h6": pc.get("h6"),
+        "h24": pc.get("h24"),
+        "buys": txns.get("buys"),
+        "sells": txns.get("sells"),
+        "riskLabel": r.risk_label,
+        "riskClass": r.raw.get("_riskClass"),
+    }
+
+
+class Subscription:
+    __slots__ = ("pairs", "pending", "ready")
+
+    def __init__(self, pairs: dict[str, str]):
+        self.pairs = pairs                      # pair address -> base token
+        self.pending: dict[str, dict] = {}     # pair address -> changed fields not yet sent
+        self.ready = asyncio.Event()
+
+
+class LiveHub:
+    """
+    Fans out pair updates to SSE subscribers. Clients subscribe to the
+    exact pairs their cards show (a card's pair follows the page's quote
+    preference, not necessarily the token's best pair), and updates are
+    keyed by pair address. One background poller loads the union of the
+    subscribed pairs' tokens every `poll_interval` seconds through the
+    shared snapshot cache, so each token costs one upstream poll no matter
+    how many tabs watch it, and only fields that changed since the last
+    poll are pushed. Slow clients never queue up: pending changes are
+    merged per pair until the client's stream picks them up.
+    """
+
+    def __init__(self, snapshots: TokenSnapshotService, poll_interval: float = LIVE_POLL_SECONDS):
+        self._snapshots = snapshots
+        self.poll_interval = poll_interval
+        self._by_pair: dict[str, set[Subscription]] = {}
+        self._token_of: dict[str, str] = {}     # pair address -> base token
+        self._last: dict[str, dict] = {}
+        self._poller: asyncio.Task | None = None
+        self.polls = 0
+
+    def subscribe(self, pairs: dict[str, str]) -> Subscription:
+        """`pairs` maps pair address -> base token address."""
+        kept = [(pair, token) for pair, token in pairs.items() if pair and token][:LIVE_MAX_TOKENS]
+        sub = Subscription(dict(kept))
+        for pair, token in sub.pairs.items():
+            self._by_pair.setdefault(pair, set()).add(sub)
+            self._token_of[pair] = token
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_loop(), name="live:poller")
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        for pair in sub.pairs:
+            subs = self._by_pair.get(pair)
+            if subs is None:
+                continue
+            subs.discard(sub)
+            if not subs:
+                del self._by_pair[pair]
+                self._token_of.pop(pair, None)
+                self._last.pop(pair, None)
+
+    def _publish(self, pair: str, fields: dict):
+        last = self._last.get(pair)
+        self._last[pair] = fields
+        if last is None:
+            return      # first sighting is the baseline; pages were rendered from the same data
+        changed = {k: v for k, v in fields.items() if last.get(k) != v}
+        if not changed:
+            return
+        for sub in self._by_pair.get(pair, ()):
+            sub.pending.setdefault(pair, {}).update(changed)
+            sub.ready.set()
+
+    async def _poll_loop(self):
+        mark_background()
+        while self._by_pair:
+            tokens = list(dict.fromkeys(self._token_of.values()))
+            try:
+                snaps = await self._snapshots.refresh_many(tokens, max_age=self.poll_interval)
+            except Exception as e:
+                print(f"[token_universe] live poll failed for {len(tokens)} tokens: {e!r}")
+            else:
+                self.polls += 1
+                for pair, token in list(self._token_of.items()):
+                    snap = snaps.get(token)
+                    record = snap.pair(pair) if snap is not None else None
+                    if record is not None:
+                        self._publish(pair, live_fields(record))
+            await asyncio.sleep(self.poll_interval)
+
+    async def stream(self, pairs: dict[str, str]) -> AsyncIterator[str]:
+        """SSE event stream for one client; unsubscribes when the client goes away."""
+        sub = self.subscribe(pairs)
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(sub.ready.wait(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                sub.ready.clear()
+                pending, sub.pending = sub.pending, {}
+                yield f"event: update\ndata: {json.dumps(pending)}\n\n"
+        finally:
+            self.unsubscribe(sub)
+
+    async def stop(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+
+    def stats(self) -> dict:
+        subs = set().union(*self._by_pair.values()) if self._by_pair else set()
+        return {
+            "subscribers": len(subs),
+            "pairs": len(self._by_pair),
+            "tokens": len(set(self._token_of.values())),
+            "polls": self.polls,
+        }
@@ -0,0 +1,195 @@
+import asyncio
+
+from app.services.breaker import breakers
+from app.services.cache import cache
+from app.services.ratelimit import limiters
+
+PREFIX = "token_universe"
+# Upper bounds in seconds; the last bucket is +Inf.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+LOOP_LAG_INTERVAL_SECONDS = 0.5
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    __slots__ = ("name", "help", "labelnames", "values")
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def expose(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_num(value)}")
+        return lines
+
+
+class Histogram:
+    __slots__ = ("name", "help", "labelnames", "buckets", "series")
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.series: dict[tuple, list] = {}    # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labels):
+        s = self.series.get(labels)
+        if s is None:
+            s = self.series[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                s[i] += 1
+        s[-2] += value
+        s[-1] += 1
+
+    def expose(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, s in sorted(self.series.items()):
+            for bound, n in zip((*self.buckets, "+Inf"), (*s[:-2], s[-1])):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {n}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {s[-2]!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {s[-1]}")
+        return lines
+
+
+def _samples(kind: str, name: str, help: str, labelnames: tuple[str, ...], samples) -> list[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labelnames, labels)} {_num(value)}")
+    return lines
+
+
+def _gauge(name: str, help: str, labelnames: tuple[str, ...], samples) -> list[str]:
+    return _samples("gauge", name, help, labelnames, samples)
+
+
+def _counter(name: str, help: str, labelnames: tuple[str, ...], samples) -> list[str]:
+    """A counter kept by another component (e.g. RateLimiter.stats()), read at render time."""
+    return _samples("counter", name, help, labelnames, samples)
+
+
+upstream_requests = Counter(
+    f"{PREFIX}_upstream_requests_total",
+    "Upstream HTTP requests by endpoint and status (\"error\" for transport failures).",
+    ("endpoint", "status"),
+)
+upstream_latency = Histogram(
+    f"{PREFIX}_upstream_request_seconds",
+    "Upstream HTTP request latency, excluding rate-limit waits.",
+    ("endpoint",),
+)
+render_latency = Histogram(
+    f"{PREFIX}_template_render_seconds",
+    "Jinja template render time.",
+    ("template",),
+)
+stage_latency = Histogram(
+    f"{PREFIX}_request_stage_seconds",
+    "Per-stage request latency for requests timed by ServerTimingMiddleware.",
+    ("stage",),
+)
+loop_lag = Histogram(
+    f"{PREFIX}_event_loop_lag_seconds",
+    "How late the event loop woke a periodic sleep.",
+    buckets=LOOP_LAG_BUCKETS,
+)
+_loop_lag_last = 0.0
+
+
+def observe_upstream(endpoint: str, status: int | str, seconds: float):
+    upstream_requests.inc(endpoint, str(status))
+    upstream_latency.observe(seconds, endpoint)
+
+
+def observe_render(template: str, seconds: float):
+    render_latency.observe(seconds, template)
+
+
+def observe_stage(stage: str, seconds: float):
+    stage_latency.observe(seconds, stage)
+
+
+async def run_loop_lag_monitor(interval: float = LOOP_LAG_INTERVAL_SECONDS):
+    """Sleeps `interval` in a loop and records how late each wakeup was."""
+    global _loop_lag_last
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        _loop_lag_last = max(0.0, loop.time() - start - interval)
+        loop_lag.observe(_loop_lag_last)
+
+
+def _cache_lines() -> list[str]:
+    stats = cache.stats()
+    lines = []
+    for field in ("hits", "stale_hits", "misses", "evictions", "expirations"):
+        name = f"{PREFIX}_cache_{field}_total"
+        lines += [f"# HELP {name} Cache {field.replace('_', ' ')} per key namespace.", f"# TYPE {name} counter"]
+        lines += [f'{name}{{namespace="{_escape(ns)}"}} {s[field]}' for ns, s in stats.items()]
+
+    def ratio(s: dict) -> float:
+        total = s["hits"] + s["stale_hits"] + s["misses"]
+        return round((s["hits"] + s["stale_hits"]) / total, 4) if total else 0.0
+
+    lines += _gauge(f"{PREFIX}_cache_hit_ratio", "Fresh plus stale hits over all lookups, since start.",
+                    ("namespace",), (((ns,), ratio(s)) for ns, s in stats.items()))
+    lines += _gauge(f"{PREFIX}_cache_entries", "Cached entries per key namespace.",
+                    ("namespace",), (((ns,), s["entries"]) for ns, s in stats.items()))
+    lines += _gauge(f"{PREFIX}_cache_bytes", "Approximate cached bytes per key namespace.",
+                    ("namespace",), (((ns,), s["bytes"]) for ns, s in stats.items()))
+    return lines
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    # Imported here: singleflight imports timing, which records into this module.
+    from app.services.singleflight import flights
+
+    lines = upstream_requests.expose() + upstream_latency.expose()
+    lines += _gauge(f"{PREFIX}_circuit_open", "1 while an endpoint's circuit breaker is not closed.",
+                    ("endpoint",), (((name,), int(b["state"] != "closed")) for name, b in breakers.stats().items()))
+    lines += _gauge(f"{PREFIX}_ratelimit_queue_depth", "Callers waiting for an upstream rate-limit token.",
+                    ("limiter", "priority"),
+                    (((name, prio), n) for name, lim in sorted(limiters.items()) for prio, n in lim.queue_depth().items()))
+    by_limiter = sorted(limiters.items())
+    lines += _counter(f"{PREFIX}_ratelimit_acquisitions_total", "Rate-limit tokens handed out, queued or not.",
+                      ("limiter",), (((name,), lim.acquired) for name, lim in by_limiter))
+    lines += _counter(f"{PREFIX}_ratelimit_queued_total", "Acquisitions that had to wait in the queue.",
+                      ("limiter",), (((name,), lim.queued) for name, lim in by_limiter))
+    lines += _counter(f"{PREFIX}_ratelimit_wait_seconds_total", "Time spent waiting for a rate-limit token.",
+                      ("limiter",), (((name,), lim.wait_seconds) for name, lim in by_limiter))
+    lines += _counter(f"{PREFIX}_ratelimit_throttled_total", "429 responses that paused the bucket.",
+                      ("limiter",), (((name,), lim.throttled) for name, lim in by_limiter))
+    lines += _cache_lines()
+    lines += _gauge(f"{PREFIX}_singleflight_in_flight", "Distinct keys with a load in flight.", (), [((), flights.in_flight())])
+    lines += _gauge(f"{PREFIX}_singleflight_waiters", "Callers waiting on an in-flight load.", (), [((), flights.waiting())])
+    lines += render_latency.expose()
+    lines += stage_latency.expose()
+    lines += loop_lag.expose()
+    lines += _gauge(f"{PREFIX}_event_loop_lag_last_seconds", "Most recent event-loop lag sample.", (), [((), _loop_lag_last)])
+    return "\n".join(lines) + "\n"
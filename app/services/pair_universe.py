@@ -0,0 +1,173 @@
+import heapq
+import time
+from collections import OrderedDict
+
+from app.services.pairs import PairRecord
+from app.settings import CRAWLER_MAX_AGE_SECONDS, CRAWLER_MAX_PAIRS
+
+WATCH_SECONDS = 15 * 60         # a watchlist/live view keeps a token hot this long
+MAX_PENDING_WATCHES = 2000      # watched tokens not crawled yet (oldest dropped first)
+DEAD_LIQ_USD = 100              # pairs below both of these are dropped on refresh
+DEAD_VOL_USD = 10
+
+# Target refresh interval by activity: watched tokens, then 24h volume tiers.
+WATCHED_REFRESH_SECONDS = 30
+VOLUME_TIERS = ((1_000_000, 60), (50_000, 180), (0, 600))
+
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+
+
+def _alive(r: PairRecord) -> bool:
+    return r.liq_usd >= DEAD_LIQ_USD or r.vol24 >= DEAD_VOL_USD
+
+
+class _TrackedToken:
+    __slots__ = ("mint", "pairs", "updated_at", "watched_until", "failures", "retry_at")
+
+    def __init__(self, mint: str):
+        self.mint = mint
+        self.pairs: dict[str, PairRecord] = {}
+        self.updated_at = 0.0           # last time fresh pair data arrived, from any source
+        self.watched_until = 0.0
+        self.failures = 0
+        self.retry_at = 0.0
+
+    def refresh_interval(self, now: float) -> float:
+        if self.watched_until > now:
+            return WATCHED_REFRESH_SECONDS
+        vol = max((r.vol24 for r in self.pairs.values()), default=0.0)
+        for threshold, seconds in VOLUME_TIERS:
+            if vol >= threshold:
+                return seconds
+        return VOLUME_TIERS[-1][1]
+
+
+class PairUniverse:
+    """
+    Every Solana pair the app has seen, grouped by base token. Fed by
+    ingest_pairs from all sources and kept current by the crawler, which asks
+    `due()` which tokens to refresh: the most overdue relative to a target
+    interval that shrinks with 24h volume and watchlist interest. Holds at
+    most `max_pairs` pairs (least recently updated tokens dropped first);
+    tokens without fresh data for `max_age` seconds age out.
+    """
+
+    def __init__(self, max_pairs: int = CRAWLER_MAX_PAIRS, max_age: float = CRAWLER_MAX_AGE_SECONDS):
+        self.max_pairs = max_pairs
+        self.max_age = max_age
+        self._tokens: OrderedDict[str, _TrackedToken] = OrderedDict()
+        self._pair_count = 0
+        # Watched tokens without pairs yet; they do not count toward max_pairs.
+        self._pending: OrderedDict[str, None] = OrderedDict()
+        self.dropped = 0
+
+    def _token(self, mint: str) -> _TrackedToken:
+        tok = self._tokens.get(mint)
+        if tok is None:
+            tok = self._tokens[mint] = _TrackedToken(mint)
+        return tok
+
+    def _set_pairs(self, tok: _TrackedToken, pairs: dict[str, PairRecord]):
+        self._pair_count += len(pairs) - len(tok.pairs)
+        tok.pairs = pairs
+
+    def _remove(self, mint: str):
+        self._pending.pop(mint, None)
+        tok = self._tokens.pop(mint, None)
+        if tok is not None:
+            self._pair_count -= len(tok.pairs)
+            self.dropped += 1
+
+    def add(self, records: list[PairRecord], now: float | None = None):
+        now = now or time.time()
+        for r in records:
+            if not r.base_address or not r.pair_address:
+                continue
+            tok = self._token(r.base_address)
+            self._pending.pop(r.base_address, None)
+            if r.pair_address not in tok.pairs:
+                self._pair_count += 1
+            tok.pairs[r.pair_address] = r
+            tok.updated_at = now
+            tok.failures = 0
+            tok.retry_at = 0.0
+            self._tokens.move_to_end(r.base_address)
+
+        while self._pair_count > self.max_pairs and self._tokens:
+            self._remove(next(iter(self._tokens)))
+
+    def settle(self, mints: list[str], records: list[PairRecord]):
+        """
+        Makes a crawl result authoritative for `mints`: pairs no longer
+        listed or dead are dropped, and so are tokens left without pairs.
+        """
+        listed: dict[str, dict[str, PairRecord]] = {m: {} for m in mints}
+        for r in records:
+            if r.base_address in listed and _alive(r):
+                listed[r.base_address][r.pair_address] = r
+        for mint, pairs in listed.items():
+            tok = self._tokens.get(mint)
+            if tok is None:
+                continue
+            if not pairs:
+                self._remove(mint)
+                continue
+            self._set_pairs(tok, pairs)
+
+    def failed(self, mints: list[str], now: float | None = None):
+        now = now or time.time()
+        for mint in mints:
+            tok = self._tokens.get(mint)
+            if tok is not None:
+                tok.failures += 1
+                tok.retry_at = now + min(RETRY_BASE_SECONDS * 2 ** (tok.failures - 1), RETRY_MAX_SECONDS)
+
+    def watch(self, mints: list[str], now: float | None = None):
+        """Marks tokens as being watched; unknown ones are tracked so the crawler picks them up."""
+        now = now or time.time()
+        for mint in mints:
+            if not mint:
+                continue
+            if mint not in self._tokens:
+                self._pending[mint] = None
+            self._token(mint).watched_until = now + WATCH_SECONDS
+        while len(self._pending) > MAX_PENDING_WATCHES:
+            self._remove(next(iter(self._pending)))
+
+    def due(self, limit: int, now: float | None = None) -> list[str]:
+        """Up to `limit` tokens past their refresh interval, most overdue first."""
+        now = now or time.time()
+        scored = []
+        for tok in self._tokens.values():
+            if tok.retry_at > now:
+                continue
+            overdue = (now - tok.updated_at) / tok.refresh_interval(now)
+            if overdue >= 1:
+                scored.append((overdue, tok.mint))
+        return [mint for _, mint in heapq.nlargest(limit, scored)]
+
+    def age_out(self, now: float | None = None) -> int:
+        now = now or time.time()
+        cutoff = now - self.max_age
+        stale = [m for m, t in self._tokens.items() if t.updated_at < cutoff and t.watched_until <= now]
+        for mint in stale:
+            self._remove(mint)
+        return len(stale)
+
+    def records(self) -> list[PairRecord]:
+        return [r for tok in self._tokens.values() for r in tok.pairs.values()]
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            "tokens": len(self._tokens),
+            "pairs": self._pair_count,
+            "pending": len(self._pending),
+            "watched": sum(1 for t in self._tokens.values() if t.watched_until > now),
+            "backing_off": sum(1 for t in self._tokens.values() if t.retry_at > now),
+            "dropped": self.dropped,
+        }
+
+
+pair_universe = PairUniverse()
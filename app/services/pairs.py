@@ -0,0 +1,210 @@
+import heapq
+import sys
+import time
+from operator import attrgetter
+from typing import Callable
+
+from app.services.cache import approx_size
+
+
+def _float(x) -> float:
+    try:
+        return float(x or 0)
+    except Exception:
+        return 0.0
+
+
+def _liq_locked(liq) -> bool | None:
+    if not isinstance(liq, dict):
+        return None
+    if "locked" in liq:
+        return bool(liq.get("locked"))
+    if "isLocked" in liq:
+        return bool(liq.get("isLocked"))
+    status = liq.get("lockStatus") or liq.get("status")
+    if isinstance(status, str):
+        s = status.lower()
+        if s in ("locked", "lockedliquidity", "locked_liquidity"):
+            return True
+        if s in ("unlocked", "notlocked"):
+            return False
+    return None
+
+
+class PairRecord:
+    """
+    A DexScreener pair parsed once at ingest: numeric fields are ready for
+    filtering, sorting and risk scoring, and the untouched payload is kept in
+    `raw` for templates and JSON responses.
+    """
+
+    __slots__ = (
+        "raw",
+        "pair_address",
+        "base_address",
+        "base_symbol",
+        "quote_address",
+        "quote_symbol",
+        "price_usd",
+        "liq_usd",
+        "vol24",
+        "mcap",
+        "txns24",
+        "created_ms",
+        "h24",
+        "liq_locked",
+        "verified",
+        "rarity",
+        "risk_score",
+        "risk_label",
+    )
+
+    def __init__(self, raw: dict):
+        base = raw.get("baseToken") or {}
+        quote = raw.get("quoteToken") or {}
+        liq = raw.get("liquidity") or {}
+        txns = (raw.get("txns") or {}).get("h24") or {}
+
+        self.raw = raw
+        self.pair_address = raw.get("pairAddress") or ""
+        self.base_address = base.get("address") or ""
+        self.base_symbol = base.get("symbol") or ""
+        self.quote_address = quote.get("address") or ""
+        self.quote_symbol = (quote.get("symbol") or "").upper()
+        self.price_usd = _float(raw.get("priceUsd"))
+        self.liq_usd = _float(liq.get("usd") if isinstance(liq, dict) else 0)
+        self.vol24 = _float((raw.get("volume") or {}).get("h24"))
+        self.mcap = _float(raw.get("marketCap") or raw.get("fdv"))
+        try:
+            self.txns24 = float((txns.get("buys") or 0) + (txns.get("sells") or 0))
+        except Exception:
+            self.txns24 = 0.0
+        try:
+            self.created_ms = int(raw.get("pairCreatedAt") or 0)
+        except Exception:
+            self.created_ms = 0
+        self.h24 = _float((raw.get("priceChange") or {}).get("h24"))
+        self.liq_locked = _liq_locked(liq)
+        self.verified = False
+        self.rarity = "common"
+        self.risk_score: int | None = None
+        self.risk_label: str | None = None
+
+    def __sizeof__(self) -> int:
+        # Counted by the cache's byte budget: the payload dominates.
+        return object.__sizeof__(self) + approx_size(self.raw)
+
+
+def to_records(pairs: list[dict]) -> list[PairRecord]:
+    return [PairRecord(p) for p in pairs]
+
+
+def raw_pairs(records: list[PairRecord]) -> list[dict]:
+    return [r.raw for r in records]
+
+
+def rarity_from_liq(liq_usd: float) -> str:
+    if liq_usd >= 10_000_000: return "legendary"
+    if liq_usd >= 1_000_000:  return "epic"
+    if liq_usd >= 100_000:    return "rare"
+    return "common"
+
+
+def quote_ranker(quote_pref: list[str]):
+    ranks = {sym.upper(): i for i, sym in reversed(list(enumerate(quote_pref)))}
+    def _rank(r: PairRecord) -> int:
+        return ranks.get(r.quote_symbol, 999)
+    return _rank
+
+
+def dedupe_best_pair_per_token(records: list[PairRecord], quote_pref: list[str], limit: int = 36) -> list[PairRecord]:
+    rank = quote_ranker(quote_pref)
+    best_by_token: dict[str, PairRecord] = {}
+
+    for r in records:
+        if not r.base_address:
+            continue
+        existing = best_by_token.get(r.base_address)
+        if existing is None:
+            best_by_token[r.base_address] = r
+        elif r.liq_usd > existing.liq_usd:
+            best_by_token[r.base_address] = r
+        elif r.liq_usd == existing.liq_usd and rank(r) < rank(existing):
+            best_by_token[r.base_address] = r
+
+    return heapq.nlargest(limit, best_by_token.values(), key=lambda r: (r.liq_usd, -rank(r)))
+
+
+def record_filter(min_liq: float, min_vol: float, max_age_hours: float | None) -> Callable[[PairRecord], bool]:
+    min_created = 0
+    if max_age_hours is not None and max_age_hours > 0:
+        min_created = int(time.time() * 1000) - max_age_hours * 60 * 60 * 1000
+
+    def keep(r: PairRecord) -> bool:
+        return (
+            r.liq_usd >= min_liq
+            and r.vol24 >= min_vol
+            # unknown creation time (0) is never filtered out by age
+            and (r.created_ms <= 0 or r.created_ms >= min_created)
+        )
+    return keep
+
+
+SORT_KEYS = {
+    "liq": attrgetter("liq_usd"),
+    "mcap": attrgetter("mcap"),
+    "vol": attrgetter("vol24"),
+    "age": attrgetter("created_ms"),  # newest first
+    "h24": attrgetter("h24"),
+    "txns": attrgetter("txns24"),
+}
+
+
+def sort_name(sort: str | None) -> str:
+    name = (sort or "liq").lower()
+    return name if name in SORT_KEYS else "liq"
+
+
+def top_k(records, sort: str, limit: int, keep: Callable[[PairRecord], bool] | None = None) -> list[PairRecord]:
+    """
+    The first `limit` records kept by `keep`, in descending `sort` order,
+    without sorting everything: a bounded heap, O(n log limit).
+    """
+    candidates = records if keep is None else filter(keep, records)
+    return heapq.nlargest(limit, candidates, key=SORT_KEYS[sort_name(sort)])
+
+
+class SortedUniverse:
+    """
+    An immutable list of records plus one pre-sorted order per SORT_KEYS key,
+    built once when the universe is cached. A request walks the order it
+    asked for and stops after `limit` matches, so per-request work scales
+    with the page size rather than the universe.
+    """
+
+    __slots__ = ("records", "orders")
+
+    def __init__(self, records: list[PairRecord]):
+        self.records = records
+        # sorted() is stable, so ties keep the same order top_k gives them.
+        self.orders = {name: sorted(records, key=key, reverse=True) for name, key in SORT_KEYS.items()}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __sizeof__(self) -> int:
+        # Each record once (the orders share them), plus the order lists themselves.
+        size = object.__sizeof__(self) + sys.getsizeof(self.records) + sum(map(sys.getsizeof, self.records))
+        return size + sys.getsizeof(self.orders) + sum(map(sys.getsizeof, self.orders.values()))
+
+    def select(self, sort: str, limit: int, keep: Callable[[PairRecord], bool] | None = None) -> list[PairRecord]:
+        order = self.orders[sort_name(sort)]
+        if keep is None:
+            return order[:limit]
+        out: list[PairRecord] = []
+        for r in order:
+            if keep(r):
+                out.append(r)
+                if len(out) >= limit:
+                    break
+        return out
@@ -0,0 +1,94 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable
+
+from app.services.ratelimit import mark_background
+
+
+class PrefetchJob:
+    __slots__ = ("name", "fn", "interval", "jitter", "max_backoff", "failures", "last_ok", "last_error")
+
+    def __init__(self, name: str, fn: Callable[[], Awaitable[None]], interval: float, jitter: float, max_backoff: float):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.last_ok: float | None = None
+        self.last_error: str | None = None
+
+    def next_delay(self) -> float:
+        if self.failures:
+            base = min(self.interval * (2 ** self.failures), self.max_backoff)
+        else:
+            base = self.interval
+        return base * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class PrefetchScheduler:
+    """
+    Runs refresh jobs on fixed cadences in the background so request handlers
+    read warm cache entries instead of waiting on upstream APIs. Each job gets
+    jitter to avoid synchronized bursts and exponential backoff while failing.
+    """
+
+    def __init__(self):
+        self._jobs: list[PrefetchJob] = []
+        self._tasks: list[asyncio.Task] = []
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[], Awaitable[None]],
+        interval: float,
+        jitter: float = 0.1,
+        max_backoff: float = 300,
+    ):
+        self._jobs.append(PrefetchJob(name, fn, interval, jitter, max_backoff))
+
+    async def _run(self, job: PrefetchJob, initial_delay: float):
+        mark_background()
+        await asyncio.sleep(initial_delay)
+        while True:
+            try:
+                await job.fn()
+                job.failures = 0
+                job.last_ok = time.time()
+                job.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.failures += 1
+                job.last_error = repr(e)
+                print(f"[token_universe] prefetch {job.name} failed ({job.failures}x): {e!r}")
+            await asyncio.sleep(job.next_delay())
+
+    def start(self):
+        if self._tasks:
+            return
+        for job in self._jobs:
+            # Stagger the first runs a little so startup is not one burst.
+            initial = random.uniform(0, min(2.0, job.interval * job.jitter))
+            self._tasks.append(asyncio.create_task(self._run(job, initial), name=f"prefetch:{job.name}"))
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def status(self) -> dict[str, dict]:
+        return {
+            job.name: {
+                "interval": job.interval,
+                "failures": job.failures,
+                "last_ok": job.last_ok,
+                "last_error": job.last_error,
+            }
+            for job in self._jobs
+        }
+
+
+scheduler = PrefetchScheduler()
@@ -0,0 +1,106 @@
+import time
+from array import array
+from collections import OrderedDict
+
+from app.services.pairs import PairRecord
+from app.settings import PRICE_HISTORY_MAX_PAIRS
+
+RESOLUTION_SECONDS = 300        # one slot per 5 minutes...
+CAPACITY = 288                  # ...for the last 24 hours
+
+
+class PriceSeries:
+    """
+    Fixed-size ring buffer of (time, price, liquidity, volume) samples in
+    typed arrays. Samples landing in the same RESOLUTION_SECONDS bucket
+    overwrite the newest slot, so the series is downsampled as it is written.
+    """
+
+    __slots__ = ("times", "prices", "liqs", "vols", "head", "count")
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.times = array("I", bytes(4 * capacity))    # bucket start, epoch seconds
+        self.prices = array("f", bytes(4 * capacity))
+        self.liqs = array("f", bytes(4 * capacity))
+        self.vols = array("f", bytes(4 * capacity))
+        self.head = 0           # index of the newest slot
+        self.count = 0
+
+    def add(self, ts: float, price: float, liq: float, vol: float, resolution: int = RESOLUTION_SECONDS):
+        bucket = int(ts) // resolution * resolution
+        if self.count and self.times[self.head] == bucket:
+            i = self.head
+        elif self.count and bucket < self.times[self.head]:
+            return      # out of order; the newer sample already won
+        else:
+            i = (self.head + 1) % len(self.times) if self.count else 0
+            self.head = i
+            self.count = min(self.count + 1, len(self.times))
+        self.times[i] = bucket
+        self.prices[i] = price
+        self.liqs[i] = liq
+        self.vols[i] = vol
+
+    def _indexes(self):
+        cap = len(self.times)
+        start = (self.head - self.count + 1) % cap
+        return ((start + k) % cap for k in range(self.count))
+
+    def points(self, since: float = 0) -> list[tuple[int, float]]:
+        """(bucket time, price) pairs, oldest first."""
+        return [(self.times[i], self.prices[i]) for i in self._indexes() if self.times[i] >= since]
+
+    def column(self, field: str, since: float = 0) -> list[float]:
+        values = {"price": self.prices, "liq": self.liqs, "vol": self.vols}[field]
+        return [values[i] for i in self._indexes() if self.times[i] >= since]
+
+
+class PriceHistory:
+    """
+    Per-pair price series for every pair the app fetches, keyed by pair
+    address. Holds at most `max_pairs` series; the least recently updated
+    pair is dropped first, so memory stays at roughly
+    max_pairs * CAPACITY * 16 bytes.
+    """
+
+    def __init__(self, max_pairs: int = PRICE_HISTORY_MAX_PAIRS):
+        self.max_pairs = max_pairs
+        self._series: OrderedDict[str, PriceSeries] = OrderedDict()
+
+    def record(self, records: list[PairRecord], now: float | None = None):
+        ts = now or time.time()
+        for r in records:
+            if not r.pair_address or r.price_usd <= 0:
+                continue
+            series = self._series.get(r.pair_address)
+            if series is None:
+                series = self._series[r.pair_address] = PriceSeries()
+            else:
+                self._series.move_to_end(r.pair_address)
+            series.add(ts, r.price_usd, r.liq_usd, r.vol24)
+
+        while len(self._series) > self.max_pairs:
+            self._series.popitem(last=False)
+
+    def get(self, pair_address: str) -> PriceSeries | None:
+        return self._series.get(pair_address)
+
+    def prices(self, pair_address: str, max_points: int = 48, window_seconds: float = CAPACITY * RESOLUTION_SECONDS) -> list[float]:
+        """Up to `max_points` evenly spaced prices from the last `window_seconds`, oldest first."""
+        series = self._series.get(pair_address)
+        if series is None:
+            return []
+        values = series.column("price", since=time.time() - window_seconds)
+        if len(values) <= max_points:
+            return values
+        step = (len(values) - 1) / (max_points - 1)
+        return [values[round(k * step)] for k in range(max_points)]
+
+    def stats(self) -> dict:
+        return {
+            "pairs": len(self._series),
+            "samples": sum(s.count for s in self._series.values()),
+        }
+
+
+price_history = PriceHistory()
@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextvars import ContextVar
+
+from app.settings import (
+    DEXSCREENER_PROFILES_RPS,
+    DEXSCREENER_RPS,
+    JUPITER_RPS,
+    SOLANA_RPC_RPS,
+)
+
+# Lower value = served first.
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Priority of upstream calls made from the current task. Request handlers run
+# at the default; the prefetch scheduler and SWR refreshes mark their tasks
+# as background so they queue behind page loads.
+upstream_priority: ContextVar[int] = ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+class SharedPriority:
+    """
+    Priority of work several callers wait on (a single-flight load, a shared
+    chunk fetch): the most urgent of them. Upstream calls made for that work
+    queue at this level, and `promote` re-queues the ones already waiting,
+    including those of shared work started on its behalf.
+    """
+
+    __slots__ = ("level", "_waits", "_children")
+
+    def __init__(self, level: int):
+        self.level = level
+        self._waits: list[tuple["RateLimiter", asyncio.Future]] = []
+        self._children: list[SharedPriority] = []
+
+    def promote(self, level: int):
+        if level >= self.level:
+            return
+        self.level = level
+        for limiter, fut in self._waits:
+            limiter._requeue(fut, level)
+        for child in self._children:
+            child.promote(level)
+
+
+_shared_priority: ContextVar[SharedPriority | None] = ContextVar("shared_priority", default=None)
+
+
+def current_priority() -> int:
+    shared = _shared_priority.get()
+    return shared.level if shared is not None else upstream_priority.get()
+
+
+def mark_background():
+    upstream_priority.set(BACKGROUND)
+    _shared_priority.set(None)
+
+
+def share_priority(shared: SharedPriority | None = None) -> SharedPriority:
+    """
+    Joins the current caller to shared work: a new SharedPriority at the
+    caller's level, or `shared` promoted to it. When the caller is itself
+    shared work, later promotions of that work carry over.
+    """
+    if shared is None:
+        shared = SharedPriority(current_priority())
+    else:
+        shared.promote(current_priority())
+    parent = _shared_priority.get()
+    if parent is not None and parent is not shared:
+        parent._children.append(shared)
+    return shared
+
+
+async def with_priority(shared: SharedPriority, coro):
+    # Runs inside the task's own context, so only this work sees `shared`.
+    _shared_priority.set(shared)
+    return await coro
+
+
+class RateLimiter:
+    """
+    Token bucket (`rate` tokens/s, up to `burst`) with a priority queue in
+    front of it. When tokens run out, callers wait in priority order, FIFO
+    within a priority. `pause` blocks the bucket entirely, e.g. for the
+    duration of an upstream Retry-After.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queue: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump: asyncio.Task | None = None
+
+        self.acquired = 0
+        self.queued = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take_now(self) -> bool:
+        now = time.monotonic()
+        if self._queue or now < self._paused_until:
+            return False
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, priority: int | None = None):
+        shared = None
+        if priority is None:
+            shared = _shared_priority.get()
+            priority = shared.level if shared is not None else upstream_priority.get()
+        self.acquired += 1
+        if self._take_now():
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), fut))
+        self.queued += 1
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.ensure_future(self._run_pump())
+
+        if shared is not None:
+            shared._waits.append((self, fut))
+        started = time.monotonic()
+        try:
+            await fut
+        finally:
+            if shared is not None:
+                shared._waits.remove((self, fut))
+            waited = time.monotonic() - started
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    async def _run_pump(self):
+        while self._queue:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            self._refill(now)
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            _, _, fut = heapq.heappop(self._queue)
+            if fut.done():
+                # Waiter was cancelled; its token stays in the bucket.
+                continue
+            self._tokens -= 1
+            fut.set_result(None)
+
+    def _requeue(self, fut: asyncio.Future, priority: int):
+        self._queue = [(priority if f is fut else p, seq, f) for p, seq, f in self._queue]
+        heapq.heapify(self._queue)
+
+    def pause(self, seconds: float):
+        self.throttled += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    def queue_depth(self) -> dict[str, int]:
+        depth = {"interactive": 0, "background": 0}
+        for priority, _, fut in self._queue:
+            if not fut.done():
+                depth["interactive" if priority == INTERACTIVE else "background"] += 1
+        return depth
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "queue_depth": self.queue_depth(),
+            "acquired": self.acquired,
+            "queued": self.queued,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+            "throttled": self.throttled,
+            "paused_for": max(0.0, round(self._paused_until - time.monotonic(), 3)),
+        }
+
+
+# DexScreener documents 300 req/min for pairs/tokens/search and 60 req/min for
+# token profiles and boosts; defaults leave some headroom under both.
+LIMITS = {
+    "dexscreener": (DEXSCREENER_RPS, 10),
+    "dexscreener_profiles": (DEXSCREENER_PROFILES_RPS, 3),
+    "solana_rpc": (SOLANA_RPC_RPS, 20),
+    "jupiter": (JUPITER_RPS, 10),
+}
+
+limiters: dict[str, RateLimiter] = {name: RateLimiter(name, rate, burst) for name, (rate, burst) in LIMITS.items()}
+
+
+def limiter_stats() -> dict[str, dict]:
+    return {name: lim.stats() for name, lim in limiters.items()}
@@ -0,0 +1,413 @@
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import neg
+from functools import lru_cache
+from typing import Callable
+
+from app.services.pairs import PairRecord, sort_name
+from app.services.risk import compute_risk
+
+BUCKETS = 64                    # precomputed prefix masks per column
+SPARSE_BUCKET = 50              # matches below 1/50 of a bucket are pulled out bit by bit
+MAX_EXPRESSION_LENGTH = 500
+MAX_CONDITIONS = 32
+HOUR_MS = 3600 * 1000
+NAN = float("nan")
+
+
+class ScreenerError(ValueError):
+    """A filter expression that does not parse; the message is safe to show to users."""
+
+
+def _change(window: str) -> Callable[[PairRecord], float]:
+    def get(r: PairRecord) -> float:
+        try:
+            return float((r.raw.get("priceChange") or {}).get(window))
+        except (TypeError, ValueError):
+            return NAN
+    return get
+
+
+def _risk(r: PairRecord) -> float:
+    if r.risk_score is not None:
+        return float(r.risk_score)
+    # Not enriched yet: the market-data part of the score. Mintable and
+    # freezable tokens never get this far (see main._build_screener_snapshot).
+    score, _ = compute_risk(
+        {
+            "liquidityUsd": r.liq_usd,
+            "volume24h": r.vol24,
+            "txns24h": r.txns24,
+            "pairCreatedAt": r.created_ms,
+            "priceChange24h": r.h24,
+        },
+        is_verified=r.verified,
+        liq_locked=r.liq_locked,
+    )
+    return float(score)
+
+
+# One float64 column per field; NaN means unknown and never matches a comparison.
+COLUMNS: dict[str, Callable[[PairRecord], float]] = {
+    "liq": lambda r: r.liq_usd,
+    "vol": lambda r: r.vol24,
+    "mcap": lambda r: r.mcap,
+    "price": lambda r: r.price_usd,
+    "txns": lambda r: r.txns24,
+    "h1": _change("h1"),
+    "h6": _change("h6"),
+    "h24": lambda r: r.h24,
+    "created": lambda r: float(r.created_ms) if r.created_ms > 0 else NAN,
+    "risk": _risk,
+}
+
+# Names accepted in expressions. `age` is in hours and is answered from `created`.
+FIELDS = {
+    "liq": "liq", "liquidity": "liq",
+    "vol": "vol", "vol24": "vol", "volume": "vol",
+    "mcap": "mcap", "fdv": "mcap", "marketcap": "mcap",
+    "price": "price",
+    "txns": "txns", "txns24": "txns",
+    "h1": "h1", "h6": "h6", "h24": "h24",
+    "age": "age",
+    "risk": "risk",
+}
+
+# pairs.SORT_KEYS name -> column; "age" sorts newest first, as it does there.
+SORT_COLUMNS = {"liq": "liq", "mcap": "mcap", "vol": "vol", "age": "created", "h24": "h24", "txns": "txns"}
+
+_SUFFIX = {"": 1.0, "k": 1e3, "m": 1e6, "b": 1e9}
+_TOKEN = re.compile(
+    r"\s*(?:"
+    r"(?P<num>-?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)(?P<suffix>[kmb]?)(?![a-z0-9_])"
+    r"|(?P<op>>=|<=|==|!=|=|>|<)"
+    r"|(?P<word>[a-z_][a-z0-9_]*)"
+    r"|(?P<paren>[()])"
+    r"|(?P<bad>\S))",
+    re.IGNORECASE,
+)
+_FLIPPED = {">": "<", ">=": "<=", "<": ">", "<=": ">=", "==": "==", "!=": "!="}
+
+
+def _tokenize(text: str) -> list[tuple[str, object]]:
+    tokens: list[tuple[str, object]] = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        pos = m.end()
+        if m.group("num") is not None:
+            tokens.append(("num", float(m.group("num")) * _SUFFIX[m.group("suffix").lower()]))
+        elif m.group("op"):
+            op = m.group("op")
+            tokens.append(("op", "==" if op == "=" else op))
+        elif m.group("word"):
+            tokens.append(("word", m.group("word").lower()))
+        elif m.group("paren"):
+            tokens.append((m.group("paren"), None))
+        else:
+            raise ScreenerError(f"unexpected {m.group('bad')!r}")
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent over:
+        expr       := term ("or" term)*
+        term       := factor ("and" factor)*
+        factor     := "not" factor | "(" expr ")" | comparison
+        comparison := field op number | field "between" number "and" number
+    Nodes are tuples: ("cmp", field, op, value), ("between", field, lo, hi),
+    ("and", a, b), ("or", a, b), ("not", a).
+    """
+
+    def __init__(self, tokens: list[tuple[str, object]]):
+        self.tokens = tokens
+        self.pos = 0
+        self.conditions = 0
+
+    def peek(self) -> tuple[str, object] | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, kind: str, value: object = None) -> object:
+        tok = self.peek()
+        if tok is None or tok[0] != kind or (value is not None and tok[1] != value):
+            found = "end of expression" if tok is None else repr(tok[1] if tok[1] is not None else tok[0])
+            raise ScreenerError(f"expected {value or kind}, found {found}")
+        self.pos += 1
+        return tok[1]
+
+    def keyword(self, word: str) -> bool:
+        if self.peek() == ("word", word):
+            self.pos += 1
+            return True
+        return False
+
+    def parse(self) -> tuple:
+        node = self.expr()
+        if self.peek() is not None:
+            self.take("end")
+        return node
+
+    def expr(self) -> tuple:
+        node = self.term()
+        while self.keyword("or"):
+            node = ("or", node, self.term())
+        return node
+
+    def term(self) -> tuple:
+        node = self.factor()
+        while self.keyword("and"):
+            node = ("and", node, self.factor())
+        return node
+
+    def factor(self) -> tuple:
+        if self.keyword("not"):
+            return ("not", self.factor())
+        if self.peek() == ("(", None):
+            self.pos += 1
+            node = self.expr()
+            self.take(")")
+            return node
+        return self.comparison()
+
+    def comparison(self) -> tuple:
+        name = self.take("word")
+        field = FIELDS.get(name)
+        if field is None:
+            raise ScreenerError(f"unknown field {name!r}; use one of {', '.join(sorted(FIELDS))}")
+        self.conditions += 1
+        if self.conditions > MAX_CONDITIONS:
+            raise ScreenerError(f"too many conditions (max {MAX_CONDITIONS})")
+        if self.keyword("between"):
+            lo = self.take("num")
+            self.take("word", "and")
+            hi = self.take("num")
+            return ("between", field, min(lo, hi), max(lo, hi))
+        return ("cmp", field, self.take("op"), self.take("num"))
+
+
+class CompiledFilter:
+    """A parsed filter expression; evaluates against any ColumnarSnapshot."""
+
+    __slots__ = ("text", "tree")
+
+    def __init__(self, text: str, tree: tuple):
+        self.text = text
+        self.tree = tree
+
+    def evaluate(self, snap: "ColumnarSnapshot") -> int:
+        """Bitmask of the snapshot rows that match: bit i set means records[i] matches."""
+        return self._eval(self.tree, snap, int(time.time() * 1000))
+
+    def _eval(self, node: tuple, snap: "ColumnarSnapshot", now_ms: int) -> int:
+        kind = node[0]
+        if kind == "and":
+            return self._eval(node[1], snap, now_ms) & self._eval(node[2], snap, now_ms)
+        if kind == "or":
+            return self._eval(node[1], snap, now_ms) | self._eval(node[2], snap, now_ms)
+        if kind == "not":
+            return snap.all_rows ^ self._eval(node[1], snap, now_ms)
+
+        field = node[1]
+        if field == "age":
+            # age < H  <=>  created > now - H hours
+            if kind == "between":
+                return snap.between("created", now_ms - node[3] * HOUR_MS, now_ms - node[2] * HOUR_MS)
+            return snap.compare("created", _FLIPPED[node[2]], now_ms - node[3] * HOUR_MS)
+        if kind == "between":
+            return snap.between(field, node[2], node[3])
+        return snap.compare(field, node[2], node[3])
+
+
+@lru_cache(maxsize=256)
+def compile_filter(text: str) -> CompiledFilter:
+    """
+    Parses a filter expression such as
+    `liq > 50k and h24 between -10 and 80 and risk <= 55 and txns > 500`.
+    Numbers take k/m/b suffixes; `age` is in hours. Raises ScreenerError.
+    """
+    text = (text or "").strip()
+    if not text:
+        raise ScreenerError("empty filter")
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise ScreenerError(f"filter is longer than {MAX_EXPRESSION_LENGTH} characters")
+    return CompiledFilter(text, _Parser(_tokenize(text)).parse())
+
+
+class _Column:
+    __slots__ = ("order", "desc", "valid", "prefix", "rank")
+
+    def __init__(self, values: array, step: int):
+        # NaN != NaN: unknown values are left out of the order and the masks.
+        known = [i for i, v in enumerate(values) if v == v]
+        # Descending and stable, like SortedUniverse; unknown values go last.
+        known.sort(key=values.__getitem__, reverse=True)
+        self.valid = len(known)
+        self.desc = array("d", map(values.__getitem__, known))
+        self.order = array("I", known)
+        if self.valid < len(values):
+            self.order.extend(i for i, v in enumerate(values) if v != v)
+        # prefix[j]: bitmask of the rows at order positions [0, j * step).
+        bits = bytearray((len(values) + 7) // 8)
+        self.prefix = [0]
+        for start in range(0, self.valid, step):
+            for row in known[start:start + step]:
+                bits[row >> 3] |= 1 << (row & 7)
+            self.prefix.append(int.from_bytes(bits, "little"))
+        self.rank: array | None = None
+
+
+class ColumnarSnapshot:
+    """
+    An immutable, column-oriented copy of a list of PairRecords: one float64
+    array per COLUMNS field, each with a descending sort order and prefix
+    bitmasks at BUCKETS boundaries of that order. A comparison is a bisect
+    plus the nearest prefix mask patched by at most step/2 bits, and
+    conditions combine with integer &, | and ^, so evaluating a filter costs
+    a few small loops whatever the number of rows. Results are read back by
+    walking a pre-sorted order, or for sparse matches by collecting the set
+    bits and taking a heap top-K.
+    """
+
+    def __init__(self, records: list[PairRecord]):
+        self.records = records
+        self.built_at = time.time()
+        n = len(records)
+        self.nbytes = (n + 7) // 8
+        self.all_rows = (1 << n) - 1
+        self.step = max(1, -(-n // BUCKETS))
+        self.columns: dict[str, _Column] = {}
+        for name, get in COLUMNS.items():
+            self.columns[name] = _Column(array("d", map(get, records)), self.step)
+        for name in SORT_COLUMNS.values():
+            col = self.columns[name]
+            rank = array("I", [0]) * n
+            for pos, row in enumerate(col.order):
+                rank[row] = pos
+            col.rank = rank
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __sizeof__(self) -> int:
+        # What the cache accounts for; the records themselves belong to the universe.
+        size = object.__sizeof__(self)
+        for col in self.columns.values():
+            size += sys.getsizeof(col.order) + sys.getsizeof(col.desc) + sum(map(sys.getsizeof, col.prefix))
+            if col.rank is not None:
+                size += sys.getsizeof(col.rank)
+        return size
+
+    def _rows(self, col: _Column, start: int, stop: int) -> int:
+        bits = bytearray(self.nbytes)
+        order = col.order
+        for pos in range(start, stop):
+            row = order[pos]
+            bits[row >> 3] |= 1 << (row & 7)
+        return int.from_bytes(bits, "little")
+
+    def _first(self, col: _Column, k: int) -> int:
+        """Bitmask of the rows at order positions [0, k), for k <= col.valid."""
+        step = self.step
+        j, off = divmod(k, step)
+        if off == 0:
+            return col.prefix[j]
+        if off <= step // 2 or j + 1 >= len(col.prefix):
+            return col.prefix[j] ^ self._rows(col, j * step, k)
+        return col.prefix[j + 1] ^ self._rows(col, k, min((j + 1) * step, col.valid))
+
+    def _at_least(self, col: _Column, v: float) -> int:
+        return self._first(col, bisect_right(col.desc, -v, key=neg))
+
+    def _above(self, col: _Column, v: float) -> int:
+        return self._first(col, bisect_left(col.desc, -v, key=neg))
+
+    def compare(self, field: str, op: str, v: float) -> int:
+        col = self.columns[field]
+        if op == ">":
+            return self._above(col, v)
+        if op == ">=":
+            return self._at_least(col, v)
+        known = col.prefix[-1]
+        if op == "<":
+            return known ^ self._at_least(col, v)
+        if op == "<=":
+            return known ^ self._above(col, v)
+        equal = self._at_least(col, v) ^ self._above(col, v)
+        return equal if op == "==" else known ^ equal
+
+    def between(self, field: str, lo: float, hi: float) -> int:
+        col = self.columns[field]
+        return self._at_least(col, lo) ^ self._above(col, hi)
+
+    def select(self, mask: int, sort: str, limit: int, keep: Callable[[PairRecord], bool] | None = None) -> list[PairRecord]:
+        """
+        The first `limit` matching records in SortedUniverse order for `sort`.
+        Goes through the sort column one prefix bucket at a time, skipping
+        buckets with no match; a bucket with a few matches has them pulled
+        out of the mask and ranked, a busier one is walked in order.
+        """
+        if not mask or limit <= 0:
+            return []
+        col = self.columns[SORT_COLUMNS[sort_name(sort)]]
+        records = self.records
+        prefix = col.prefix
+        bits: bytes | None = None
+        out: list[PairRecord] = []
+        for j in range(len(prefix)):
+            if j + 1 < len(prefix):
+                start, stop = j * self.step, min((j + 1) * self.step, col.valid)
+                sub = mask & (prefix[j + 1] ^ prefix[j])
+            else:
+                # Rows whose sort value is unknown come last.
+                start, stop = col.valid, len(col.order)
+                sub = mask & (self.all_rows ^ prefix[-1])
+            if not sub:
+                continue
+            if sub.bit_count() * SPARSE_BUCKET < stop - start:
+                rows = []
+                while sub:
+                    top = sub.bit_length() - 1
+                    rows.append(top)
+                    sub ^= 1 << top
+                rows.sort(key=col.rank.__getitem__)
+            else:
+                if bits is None:
+                    bits = mask.to_bytes(self.nbytes, "little")
+                rows = [row for row in col.order[start:stop] if bits[row >> 3] >> (row & 7) & 1]
+            for row in rows:
+                r = records[row]
+                if keep is None or keep(r):
+                    out.append(r)
+                    if len(out) >= limit:
+                        return out
+        return out
+
+    def screen(self, flt: CompiledFilter, sort: str, limit: int, keep: Callable[[PairRecord], bool] | None = None) -> tuple[list[PairRecord], int]:
+        """(first `limit` matches in `sort` order, total rows matching `flt`)."""
+        mask = flt.evaluate(self)
+        return self.select(mask, sort, limit, keep), mask.bit_count()
+
+
+_snapshots: dict[int, tuple[object, ColumnarSnapshot]] = {}
+SNAPSHOT_MEMO = 32
+
+
+def snapshot_of(owner, records: list[PairRecord]) -> ColumnarSnapshot:
+    """
+    The snapshot of an immutable, cached record list (e.g. a SortedUniverse),
+    built on first use and reused for as long as `owner` is the object in
+    the cache. Keyed by identity; holding `owner` keeps its id from being reused.
+    """
+    hit = _snapshots.get(id(owner))
+    if hit is not None and hit[0] is owner:
+        return hit[1]
+    snap = ColumnarSnapshot(records)
+    if len(_snapshots) >= SNAPSHOT_MEMO:
+        _snapshots.pop(next(iter(_snapshots)))
+    _snapshots[id(owner)] = (owner, snap)
+    return snap
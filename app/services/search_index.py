@@ -0,0 +1,193 @@
+import re
+import time
+from collections import OrderedDict
+
+from app.services.pairs import PairRecord
+from app.settings import SEARCH_INDEX_MAX_AGE_SECONDS, SEARCH_INDEX_MAX_TOKENS
+
+PAIRS_PER_TOKEN = 8             # most liquid pairs kept per token
+NAME_INDEX_CHARS = 32           # only the start of long names is trigram-indexed
+PRUNE_INTERVAL_SECONDS = 60
+
+_MINT_RE = re.compile(r"^[1-9A-HJ-NP-Za-km-z]{32,44}$")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def looks_like_mint(q: str) -> bool:
+    return bool(_MINT_RE.match(q))
+
+
+class _Token:
+    __slots__ = ("mint", "symbol", "name", "pairs", "seen_at", "terms")
+
+    def __init__(self, mint: str):
+        self.mint = mint
+        self.symbol = ""
+        self.name = ""
+        self.pairs: dict[str, PairRecord] = {}
+        self.seen_at = 0.0
+        self.terms: tuple[str, ...] = ()
+
+    @property
+    def liq_usd(self) -> float:
+        return max((r.liq_usd for r in self.pairs.values()), default=0.0)
+
+
+class SearchIndex:
+    """
+    In-process token index over every pair the app has fetched. A token is
+    reachable by exact mint, exact symbol, symbol/name-word prefix (1-2 char
+    queries) and trigram substring (3+ chars). Bounded to `max_tokens`
+    (least recently seen evicted first); tokens not seen for `max_age`
+    seconds are dropped.
+    """
+
+    def __init__(self, max_tokens: int = SEARCH_INDEX_MAX_TOKENS, max_age: float = SEARCH_INDEX_MAX_AGE_SECONDS):
+        self.max_tokens = max_tokens
+        self.max_age = max_age
+        self._tokens: OrderedDict[str, _Token] = OrderedDict()
+        self._postings: dict[str, set[str]] = {}
+        self._last_prune = time.time()
+
+    def _terms_for(self, symbol: str, name: str) -> tuple[str, ...]:
+        terms = set()
+        if symbol:
+            terms.add("s:" + symbol)
+        for word in {symbol, *_WORD_RE.findall(name)}:
+            if word:
+                terms.add("p:" + word[:1])
+                terms.add("p:" + word[:2])
+        for text in (symbol, name[:NAME_INDEX_CHARS]):
+            terms.update("t:" + g for g in _trigrams(text))
+        return tuple(terms)
+
+    def _unlink(self, tok: _Token):
+        for term in tok.terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            posting.discard(tok.mint)
+            if not posting:
+                del self._postings[term]
+        tok.terms = ()
+
+    def _link(self, tok: _Token):
+        tok.terms = self._terms_for(tok.symbol, tok.name)
+        for term in tok.terms:
+            self._postings.setdefault(term, set()).add(tok.mint)
+
+    def _remove(self, mint: str):
+        tok = self._tokens.pop(mint, None)
+        if tok is not None:
+            self._unlink(tok)
+
+    def add(self, records: list[PairRecord]):
+        now = time.time()
+        for r in records:
+            if not r.base_address:
+                continue
+            tok = self._tokens.get(r.base_address)
+            if tok is None:
+                tok = self._tokens[r.base_address] = _Token(r.base_address)
+            else:
+                self._tokens.move_to_end(r.base_address)
+
+            base = r.raw.get("baseToken") or {}
+            symbol = r.base_symbol.lower()
+            name = (base.get("name") or "").lower()
+            if symbol != tok.symbol or name != tok.name or not tok.terms:
+                self._unlink(tok)
+                tok.symbol, tok.name = symbol, name
+                self._link(tok)
+
+            tok.pairs[r.pair_address or str(id(r))] = r
+            if len(tok.pairs) > PAIRS_PER_TOKEN:
+                keep = sorted(tok.pairs.items(), key=lambda kv: kv[1].liq_usd, reverse=True)[:PAIRS_PER_TOKEN]
+                tok.pairs = dict(keep)
+            tok.seen_at = now
+
+        while len(self._tokens) > self.max_tokens:
+            self._remove(next(iter(self._tokens)))
+        if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+            self.prune(now)
+
+    def prune(self, now: float | None = None) -> int:
+        cutoff = (now or time.time()) - self.max_age
+        # _tokens is ordered by last sighting, so aged-out tokens are at the front.
+        removed = 0
+        while self._tokens:
+            tok = next(iter(self._tokens.values()))
+            if tok.seen_at >= cutoff:
+                break
+            self._remove(tok.mint)
+            removed += 1
+        self._last_prune = now or time.time()
+        return removed
+
+    def _candidates(self, q: str) -> set[str]:
+        if len(q) < 3:
+            return set(self._postings.get("p:" + q, ()))
+        postings = [self._postings.get("t:" + g) for g in _trigrams(q)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        found = set(postings[0])
+        for p in postings[1:]:
+            found &= p
+            if not found:
+                break
+        return found
+
+    def search(self, query: str, limit: int = 40) -> list[PairRecord]:
+        """
+        Pairs of up to `limit` matching tokens: exact mint, then exact symbol,
+        symbol prefix, name-word prefix and substring matches, each group
+        ordered by liquidity.
+        """
+        raw_q = (query or "").strip()
+        if not raw_q:
+            return []
+        cutoff = time.time() - self.max_age
+
+        if looks_like_mint(raw_q):
+            tok = self._tokens.get(raw_q)
+            if tok is not None and tok.seen_at >= cutoff:
+                return list(tok.pairs.values())
+
+        q = raw_q.lower()
+        ranked: list[tuple[int, float, _Token]] = []
+        for mint in self._candidates(q):
+            tok = self._tokens[mint]
+            if tok.seen_at < cutoff:
+                continue
+            if tok.symbol == q:
+                rank = 0
+            elif tok.symbol.startswith(q):
+                rank = 1
+            elif any(w.startswith(q) for w in _WORD_RE.findall(tok.name)):
+                rank = 2
+            elif q in tok.symbol or q in tok.name:
+                rank = 3
+            else:
+                continue    # trigram false positive
+            ranked.append((rank, -tok.liq_usd, tok))
+
+        ranked.sort(key=lambda t: (t[0], t[1]))
+        out: list[PairRecord] = []
+        for _, _, tok in ranked[:limit]:
+            out.extend(tok.pairs.values())
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self._tokens),
+            "pairs": sum(len(t.pairs) for t in self._tokens.values()),
+            "terms": len(self._postings),
+        }
+
+
+search_index = SearchIndex()
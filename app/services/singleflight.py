@@ -0,0 +1,211 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from app.services.breaker import UpstreamUnavailable
+from app.services.ratelimit import SharedPriority, mark_background, share_priority, with_priority
+from app.services.timing import note_cache
+
+# Negative caching: after a load for a key fails, further loads fail fast for
+# NEGATIVE_BASE_SECONDS, doubling per consecutive failure up to the max.
+NEGATIVE_BASE_SECONDS = 5
+NEGATIVE_MAX_SECONDS = 120
+
+
+class SingleFlight:
+    """
+    Keyed request coalescing: concurrent callers for the same key share one
+    in-flight task. Its result (or exception) is delivered to every waiter.
+    A cancelled waiter only stops waiting; the shared task keeps running so
+    the remaining waiters, and the cache, still get the result. The task's
+    upstream calls run at the priority of its most urgent waiter, so a page
+    request joining a prefetch's load promotes it out of the background queue.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._priority: dict[str, SharedPriority] = {}
+        self._waiters: dict[str, int] = {}
+
+    def _forget(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._priority[key]
+        # Mark the exception as retrieved even if every waiter went away.
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            shared = self._priority[key] = share_priority()
+            task = asyncio.ensure_future(with_priority(shared, fn()))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            share_priority(self._priority[key])
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            left = self._waiters[key] - 1
+            if left:
+                self._waiters[key] = left
+            else:
+                del self._waiters[key]
+
+    def running(self, key: str) -> bool:
+        return key in self._inflight
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def waiting(self) -> int:
+        return sum(self._waiters.values())
+
+
+flights = SingleFlight()
+
+
+async def load_cached(cache, key: str, ttl: float, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    cache.get(key), or run `loader` once across all concurrent callers and
+    cache its result for `ttl` seconds. Exceptions are not cached.
+    """
+    value = cache.get(key)
+    note_cache(key, value is not None)
+    if value is not None:
+        return value
+
+    async def load():
+        value = await loader()
+        cache.set(key, value, ttl)
+        return value
+
+    return await flights.do(key, load)
+
+
+class FailureRecord:
+    __slots__ = ("count", "error")
+
+    def __init__(self, count: int, error: str):
+        self.count = count
+        self.error = error
+
+
+def failing_recently(cache, key: str) -> FailureRecord | None:
+    entry = cache.get_entry(f"neg:{key}")
+    if entry is None or entry.stale:
+        return None
+    return entry.value
+
+
+def _record_failure(cache, key: str, error: Exception):
+    entry = cache.get_entry(f"neg:{key}")
+    count = entry.value.count + 1 if entry is not None else 1
+    ttl = min(NEGATIVE_BASE_SECONDS * 2 ** (count - 1), NEGATIVE_MAX_SECONDS)
+    # The stale window only keeps the count around so the next failure backs off further.
+    cache.set(f"neg:{key}", FailureRecord(count, repr(error)), ttl, NEGATIVE_MAX_SECONDS)
+
+
+async def run_guarded(cache, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    flights.do(key, fn) with negative caching: while a recent failure for
+    `key` is remembered, raise UpstreamUnavailable instead of calling `fn`.
+    """
+    failed = failing_recently(cache, key)
+    if failed is not None:
+        raise UpstreamUnavailable(f"{key} failed recently ({failed.count}x): {failed.error}")
+
+    async def run():
+        try:
+            value = await fn()
+        except Exception as e:
+            _record_failure(cache, key, e)
+            raise
+        cache.delete(f"neg:{key}")
+        return value
+
+    return await flights.do(key, run)
+
+
+_background: set[asyncio.Future] = set()
+
+
+def _background_done(task: asyncio.Future):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[token_universe] background task failed: {task.exception()!r}")
+
+
+async def _as_background(coro):
+    # Runs in the task's own context copy, so the request that spawned it
+    # keeps its interactive priority.
+    mark_background()
+    return await coro
+
+
+def spawn_background(coro) -> asyncio.Future:
+    # Keep a reference so fire-and-forget refreshes are not garbage collected.
+    task = asyncio.ensure_future(_as_background(coro))
+    _background.add(task)
+    task.add_done_callback(_background_done)
+    return task
+
+
+async def refresh_cached(
+    cache,
+    key: str,
+    ttl: float,
+    stale_ttl: float,
+    loader: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Reload `key` now regardless of freshness (for background prefetching).
+    Joins an in-flight load for the same key instead of starting a second one,
+    and fails fast while a recent failure is negatively cached.
+    """
+    async def load():
+        value = await loader()
+        cache.set(key, value, ttl, stale_ttl)
+        return value
+
+    try:
+        return await run_guarded(cache, key, load)
+    except Exception:
+        cache.mark_refresh_failed(key)
+        raise
+
+
+async def load_swr(
+    cache,
+    key: str,
+    ttl: float,
+    stale_ttl: float,
+    loader: Callable[[], Awaitable[Any]],
+) -> tuple[Any, bool]:
+    """
+    Stale-while-revalidate read; returns (value, stale). Fresh entries are
+    returned as-is; entries inside the stale window are returned at once
+    while one background refresh runs. Misses load in the foreground and
+    raise on failure, failing fast while that failure is negatively cached.
+    `stale` is True only when the last refresh failed, i.e. the value is
+    last-known-good data from an unavailable upstream.
+    """
+    entry = cache.get_entry(key)
+    note_cache(key, entry is not None and entry.value is not None)
+    if entry is None or entry.value is None:
+        return await refresh_cached(cache, key, ttl, stale_ttl, loader), False
+    if not entry.stale:
+        return entry.value, False
+
+    async def refresh():
+        try:
+            await refresh_cached(cache, key, ttl, stale_ttl, loader)
+        except Exception as e:
+            print(f"[token_universe] background refresh failed for {key}: {e!r}")
+
+    if not flights.running(key) and failing_recently(cache, key) is None:
+        spawn_background(refresh())
+    return entry.value, entry.refresh_failed
+
@@ -0,0 +1,157 @@
+import re
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from app.services.cache import namespace_of
+from app.services.metrics import observe_stage, stage_latency
+
+DEBUG_HEADER = b"x-debug-timing"
+_TOKEN_UNSAFE = re.compile(r"[^A-Za-z0-9!#$%&'*+\-.^_`|~]")
+
+
+class RequestTiming:
+    __slots__ = ("stages", "cache")
+
+    def __init__(self):
+        self.stages: dict[str, list] = {}       # name -> [total ms, calls]
+        self.cache: dict[str, list] = {}        # stage (or namespace) -> [hits, misses]
+
+    def add(self, name: str, ms: float):
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [ms, 1]
+        else:
+            entry[0] += ms
+            entry[1] += 1
+        observe_stage(name, ms / 1000)
+
+    def header(self) -> str:
+        parts = []
+        for name, (ms, calls) in self.stages.items():
+            metric = _TOKEN_UNSAFE.sub("_", name)
+            desc = f';desc="x{calls}"' if calls > 1 else ""
+            parts.append(f"{metric};dur={ms:.1f}{desc}")
+        for name, (hits, misses) in self.cache.items():
+            parts.append(f'cache.{_TOKEN_UNSAFE.sub("_", name)};desc="hit {hits} miss {misses}"')
+        return ", ".join(parts)
+
+
+_current: ContextVar[RequestTiming | None] = ContextVar("request_timing", default=None)
+# Innermost open stage of a timed request; cache lookups are counted against it.
+_active: ContextVar[str | None] = ContextVar("request_stage", default=None)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Stage:
+    __slots__ = ("timing", "name", "start", "token")
+
+    def __init__(self, timing: RequestTiming, name: str):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.token = _active.set(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timing.add(self.name, (time.perf_counter() - self.start) * 1000)
+        _active.reset(self.token)
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str):
+    """
+    `with stage("security"): ...` times a block for the current request.
+    Outside a timed request this is a shared no-op.
+    """
+    timing = _current.get()
+    if timing is None:
+        return _NULL_STAGE
+    return _Stage(timing, name)
+
+
+def timed(name: str):
+    """Decorator form of stage() for coroutine functions."""
+    def decorate(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with stage(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def note_cache(key: str, hit: bool):
+    """Counts a cache lookup against the open stage, or the key's namespace outside one."""
+    timing = _current.get()
+    if timing is None:
+        return
+    entry = timing.cache.setdefault(_active.get() or namespace_of(key), [0, 0])
+    entry[0 if hit else 1] += 1
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that times a request when it carries the X-Debug-Timing
+    header (or always, when `always` is set), feeding the stage histograms.
+    Debug requests also get a Server-Timing response header. Untimed
+    requests pass straight through.
+    """
+
+    def __init__(self, app, always: bool = False):
+        self.app = app
+        self.always = always
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        debug = any(name == DEBUG_HEADER for name, _ in scope["headers"])
+        if not (debug or self.always):
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timing.add("total", (time.perf_counter() - start) * 1000)
+                if debug:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timing.header().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+
+
+def stage_stats() -> dict[str, dict]:
+    """Per-stage summary of the stage histogram; buckets are cumulative (le, seconds)."""
+    out = {}
+    for (name,), s in sorted(stage_latency.series.items()):
+        count = s[-1]
+        out[name] = {
+            "count": count,
+            "avg_ms": round(s[-2] / count * 1000, 3) if count else 0.0,
+            "buckets": dict(zip([*map(str, stage_latency.buckets), "+Inf"], (*s[:-2], count))),
+        }
+    return out
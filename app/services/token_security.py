@@ -1,68 +1,134 @@
+import asyncio
 import os
-import httpx
-from app.services.ttl_cache import cache
+from app.services.cache import cache
+from app.services.http import request
+from app.services.timing import note_cache, timed
 
 SOLANA_RPC_URL = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
 SECURITY_TTL_SECONDS = 3600
+# A failed lookup is cached as "unknown" only briefly so it does not mask the
+# real authorities for an hour once the RPC recovers.
+SECURITY_FAILURE_TTL_SECONDS = 30
 
+# Batched lookups: "multiple" uses getMultipleAccounts, "jsonrpc" sends a
+# JSON-RPC batch array of getAccountInfo calls (for RPCs without the former).
+RPC_BATCH_MODE = os.getenv("SOLANA_RPC_BATCH_MODE", "multiple").lower()
+RPC_MAX_KEYS = 100          # getMultipleAccounts hard limit
+RPC_MAX_CONCURRENCY = 4     # batches in flight at once
 
-async def fetch_mint_security(mint: str) -> dict:
-    """
-    Returns mint/freezer authority details for a token mint.
-    Uses Solana RPC parsed account info for a mint address.
-    """
-    if not mint:
-        return {
-            "mintAuthority": None,
-            "freezeAuthority": None,
-            "is_mintable": False,
-            "is_freezable": False,
-        }
-
-    cache_key = f"mintsec:{mint}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
-
-    payload = {
-        "jsonrpc": "2.0",
-        "id": mint,
-        "method": "getAccountInfo",
-        "params": [
-            mint,
-            {"encoding": "jsonParsed"},
-        ],
-    }
 
-    result = {
+def _empty_security() -> dict:
+    return {
         "mintAuthority": None,
         "freezeAuthority": None,
         "is_mintable": False,
         "is_freezable": False,
     }
 
-    try:
-        async with httpx.AsyncClient(timeout=12) as client:
-            resp = await client.post(SOLANA_RPC_URL, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
-            value = (data.get("result") or {}).get("value") or {}
-            parsed = (value.get("data") or {}).get("parsed") or {}
-            info = parsed.get("info") or {}
-
-            mint_auth = info.get("mintAuthority")
-            freeze_auth = info.get("freezeAuthority")
-
-            result.update(
-                {
-                    "mintAuthority": mint_auth,
-                    "freezeAuthority": freeze_auth,
-                    "is_mintable": bool(mint_auth),
-                    "is_freezable": bool(freeze_auth),
-                }
-            )
-    except Exception as e:
-        print(f"[token_universe] mint security fetch failed for {mint}: {e!r}")
-
-    cache.set(cache_key, result, SECURITY_TTL_SECONDS)
-    return result
+
+def _security_from_account(value: dict | None) -> dict:
+    parsed = ((value or {}).get("data") or {}).get("parsed") or {}
+    info = parsed.get("info") or {}
+
+    mint_auth = info.get("mintAuthority")
+    freeze_auth = info.get("freezeAuthority")
+    return {
+        "mintAuthority": mint_auth,
+        "freezeAuthority": freeze_auth,
+        "is_mintable": bool(mint_auth),
+        "is_freezable": bool(freeze_auth),
+    }
+
+
+def is_blacklisted(sec: dict | None) -> bool:
+    """Mintable or freezable tokens are never listed."""
+    return bool(sec) and bool(sec.get("is_mintable") or sec.get("is_freezable"))
+
+
+async def _rpc_multiple_accounts(mints: list[str]) -> dict[str, dict]:
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "getMultipleAccounts",
+        "params": [mints, {"encoding": "jsonParsed"}],
+    }
+    resp = await request("solana_rpc", "POST", SOLANA_RPC_URL, json=payload)
+    resp.raise_for_status()
+    data = resp.json()
+    if data.get("error"):
+        raise RuntimeError(f"getMultipleAccounts error: {data['error']}")
+    values = (data.get("result") or {}).get("value") or []
+    # The RPC answers positionally; missing accounts come back as null.
+    return {m: _security_from_account(v) for m, v in zip(mints, values)}
+
+
+async def _rpc_batch_account_info(mints: list[str]) -> dict[str, dict]:
+    payload = [
+        {
+            "jsonrpc": "2.0",
+            "id": i,
+            "method": "getAccountInfo",
+            "params": [m, {"encoding": "jsonParsed"}],
+        }
+        for i, m in enumerate(mints)
+    ]
+    resp = await request("solana_rpc", "POST", SOLANA_RPC_URL, json=payload)
+    resp.raise_for_status()
+    data = resp.json()
+    if not isinstance(data, list):
+        raise RuntimeError(f"JSON-RPC batch not supported: {data!r}"[:200])
+
+    out: dict[str, dict] = {}
+    for item in data:
+        idx = item.get("id")
+        if not isinstance(idx, int) or not 0 <= idx < len(mints):
+            continue
+        if item.get("error"):
+            print(f"[token_universe] mint security fetch failed for {mints[idx]}: {item['error']!r}")
+            continue
+        out[mints[idx]] = _security_from_account((item.get("result") or {}).get("value"))
+    return out
+
+
+@timed("security")
+async def fetch_mint_security_many(mints: list[str]) -> dict[str, dict]:
+    """
+    Mint/freeze authority details per mint. Cached mints are served from
+    `mintsec:` entries, the rest are looked up RPC_MAX_KEYS at a time with a
+    small concurrency cap; results are cached for an hour, failures briefly.
+    """
+    results: dict[str, dict] = {}
+    missing: list[str] = []
+    for mint in dict.fromkeys(m for m in mints if m):
+        cached = cache.get(f"mintsec:{mint}")
+        note_cache(f"mintsec:{mint}", cached is not None)
+        if cached is not None:
+            results[mint] = cached
+        else:
+            missing.append(mint)
+
+    if not missing:
+        return results
+
+    fetch_chunk = _rpc_batch_account_info if RPC_BATCH_MODE == "jsonrpc" else _rpc_multiple_accounts
+    sem = asyncio.Semaphore(RPC_MAX_CONCURRENCY)
+
+    async def run(chunk: list[str]):
+        async with sem:
+            try:
+                found = await fetch_chunk(chunk)
+            except Exception as e:
+                print(f"[token_universe] mint security batch failed for {len(chunk)} mints: {e!r}")
+                found = {}
+        for mint in chunk:
+            sec = found.get(mint)
+            if sec is None:
+                sec = _empty_security()
+                cache.set(f"mintsec:{mint}", sec, SECURITY_FAILURE_TTL_SECONDS)
+            else:
+                cache.set(f"mintsec:{mint}", sec, SECURITY_TTL_SECONDS)
+            results[mint] = sec
+
+    chunks = [missing[i:i + RPC_MAX_KEYS] for i in range(0, len(missing), RPC_MAX_KEYS)]
+    await asyncio.gather(*(run(c) for c in chunks))
+    return results
@@ -0,0 +1,141 @@
+import sys
+import time
+from typing import Awaitable, Callable
+
+from app.services.cache import cache
+from app.services.dexscreener import fetch_token_pairs_checked, solana_pairs_only
+from app.services.dexscreener_discovery import PAIRS_TTL_SECONDS, fetch_pairs_by_token, merge_pairs
+from app.services.ingest import ingest_pairs
+from app.services.pairs import PairRecord, raw_pairs, to_records
+from app.services.singleflight import load_swr, spawn_background
+from app.services.timing import note_cache
+
+
+class TokenSnapshot:
+    """
+    Every annotated Solana pair for one token, sorted by liquidity (best
+    first). Pages and APIs project it instead of recomputing the pipeline.
+    """
+
+    __slots__ = ("address", "records", "stale", "fetched_at")
+
+    def __init__(self, address: str, records: list[PairRecord], stale: bool = False):
+        self.address = address
+        self.records = records
+        self.stale = stale
+        self.fetched_at = time.time()
+
+    @property
+    def best(self) -> PairRecord | None:
+        return self.records[0] if self.records else None
+
+    @property
+    def best_raw(self) -> dict | None:
+        return self.records[0].raw if self.records else None
+
+    def top(self, n: int) -> list[dict]:
+        return raw_pairs(self.records[:n])
+
+    def pair(self, pair_address: str) -> PairRecord | None:
+        return next((r for r in self.records if r.pair_address == pair_address), None)
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sys.getsizeof(self.records) + sum(map(sys.getsizeof, self.records))
+
+
+def _group_by_token(records: list[PairRecord]) -> dict[str, list[PairRecord]]:
+    grouped: dict[str, list[PairRecord]] = {}
+    for r in records:
+        for addr in (r.base_address, r.quote_address):
+            if addr:
+                grouped.setdefault(addr, []).append(r)
+    return grouped
+
+
+class TokenSnapshotService:
+    """
+    One cached snapshot per token address (`token:{addr}`), shared by the coin
+    page, the drawer API and the watchlist API. `enrich` turns parsed records
+    into the decorated, risk-annotated list the app displays.
+    """
+
+    def __init__(
+        self,
+        enrich: Callable[[list[PairRecord]], Awaitable[list[PairRecord]]],
+        ttl: float = 20,
+        stale_ttl: float = 600,
+    ):
+        self._enrich = enrich
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    async def _build(self, addr: str) -> TokenSnapshot:
+        pairs, upstream_stale = await fetch_token_pairs_checked(addr)
+        records = await self._enrich(ingest_pairs(to_records(solana_pairs_only(pairs))))
+        records.sort(key=lambda r: r.liq_usd, reverse=True)
+        return TokenSnapshot(addr, records, upstream_stale)
+
+    async def get(self, addr: str) -> tuple[TokenSnapshot, bool]:
+        """(snapshot, stale); raises only when nothing is cached and the fetch fails."""
+        snap, stale = await load_swr(cache, f"token:{addr}", self.ttl, self.stale_ttl, lambda: self._build(addr))
+        return snap, stale or snap.stale
+
+    async def _load_many(self, addrs: list[str], max_age: float = PAIRS_TTL_SECONDS) -> dict[str, TokenSnapshot]:
+        by_token, failed = await fetch_pairs_by_token(addrs, max_age)
+        for addr in failed:
+            cache.mark_refresh_failed(f"token:{addr}")
+
+        records = ingest_pairs(to_records(solana_pairs_only(merge_pairs(by_token.values()))))
+        # One security lookup for every mint across all tokens.
+        grouped = _group_by_token(await self._enrich(records))
+
+        snaps: dict[str, TokenSnapshot] = {}
+        for addr in by_token:
+            records = sorted(grouped.get(addr, []), key=lambda r: r.liq_usd, reverse=True)
+            snap = TokenSnapshot(addr, records)
+            cache.set(f"token:{addr}", snap, self.ttl, self.stale_ttl)
+            snaps[addr] = snap
+        return snaps
+
+    async def get_many(self, addrs: list[str]) -> dict[str, TokenSnapshot]:
+        """
+        Snapshots for many tokens. Misses are fetched together (see
+        fetch_pairs_by_token) and risk-annotated in one pass; stale entries are served as-is
+        and refreshed in the background.
+        """
+        snaps: dict[str, TokenSnapshot] = {}
+        missing: list[str] = []
+        refresh: list[str] = []
+        for addr in dict.fromkeys(a for a in addrs if a):
+            entry = cache.get_entry(f"token:{addr}")
+            note_cache(f"token:{addr}", entry is not None)
+            if entry is None:
+                missing.append(addr)
+                continue
+            snaps[addr] = entry.value
+            if entry.stale:
+                refresh.append(addr)
+
+        if refresh:
+            spawn_background(self._load_many(refresh))
+        if missing:
+            snaps.update(await self._load_many(missing))
+        return snaps
+
+    async def refresh_many(self, addrs: list[str], max_age: float) -> dict[str, TokenSnapshot]:
+        """
+        Snapshots no older than `max_age` seconds, reloading the rest in the
+        foreground. Snapshots another caller refreshed recently are reused.
+        """
+        snaps: dict[str, TokenSnapshot] = {}
+        reload: list[str] = []
+        now = time.time()
+        for addr in dict.fromkeys(a for a in addrs if a):
+            entry = cache.get_entry(f"token:{addr}")
+            if entry is not None and now - entry.value.fetched_at < max_age:
+                snaps[addr] = entry.value
+            else:
+                reload.append(addr)
+        if reload:
+            snaps.update(await self._load_many(reload, max_age))
+        return snaps
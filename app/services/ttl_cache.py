@@ -1,21 +0,0 @@
-import time
-from typing import Any
-
-class TTLCache:
-    def __init__(self):
-        self._store: dict[str, tuple[float, Any]] = {}
-
-    def get(self, key: str) -> Any | None:
-        item = self._store.get(key)
-        if not item:
-            return None
-        expires_at, value = item
-        if time.time() >= expires_at:
-            self._store.pop(key, None)
-            return None
-        return value
-
-    def set(self, key: str, value: Any, ttl_seconds: int):
-        self._store[key] = (time.time() + ttl_seconds, value)
-
-cache = TTLCache()
@@ -10,3 +10,50 @@ TOKEN_LIST_URL = "https://token.jup.ag/all"
 
 QUOTE_TTL_SECONDS = 15
 TOKEN_LIST_TTL_SECONDS = 3600
+
+# Upstream HTTP: HTTP/2 is only used when the optional `h2` package is installed
+HTTP2_ENABLED = os.getenv("TOKEN_UNIVERSE_HTTP2", "0").lower() in ("1", "true", "yes")
+
+# Shared in-process cache bounds (entries / approximate bytes)
+CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_UNIVERSE_CACHE_MAX_ENTRIES", "20000"))
+CACHE_MAX_BYTES = int(os.getenv("TOKEN_UNIVERSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Background prefetch of discovery data (boosts, profiles, tab pairs, mint security)
+PREFETCH_ENABLED = os.getenv("TOKEN_UNIVERSE_PREFETCH", "1").lower() in ("1", "true", "yes")
+
+# Upstream request budgets (requests/second); queued callers beyond these wait,
+# page requests ahead of background refreshes
+DEXSCREENER_RPS = float(os.getenv("TOKEN_UNIVERSE_DEX_RPS", "4"))
+DEXSCREENER_PROFILES_RPS = float(os.getenv("TOKEN_UNIVERSE_DEX_PROFILES_RPS", "0.8"))
+SOLANA_RPC_RPS = float(os.getenv("TOKEN_UNIVERSE_RPC_RPS", "8"))
+JUPITER_RPS = float(os.getenv("TOKEN_UNIVERSE_JUPITER_RPS", "5"))
+
+# Local token search index fed by every fetched pair
+SEARCH_INDEX_MAX_TOKENS = int(os.getenv("TOKEN_UNIVERSE_SEARCH_INDEX_MAX_TOKENS", "20000"))
+SEARCH_INDEX_MAX_AGE_SECONDS = int(os.getenv("TOKEN_UNIVERSE_SEARCH_INDEX_MAX_AGE", str(6 * 3600)))
+
+# Intraday price history: one 24h ring buffer per pair, ~4.6 KB each
+PRICE_HISTORY_MAX_PAIRS = int(os.getenv("TOKEN_UNIVERSE_PRICE_HISTORY_MAX_PAIRS", "10000"))
+
+# Live updates pushed over SSE: one shared poll per subscribed token per interval
+LIVE_POLL_SECONDS = float(os.getenv("TOKEN_UNIVERSE_LIVE_POLL_SECONDS", "10"))
+LIVE_MAX_TOKENS = int(os.getenv("TOKEN_UNIVERSE_LIVE_MAX_TOKENS", "100"))
+
+# Per-stage timing: always on feeds the stage histograms for every request;
+# otherwise only requests sending X-Debug-Timing are timed (and get Server-Timing)
+TIMING_ALWAYS = os.getenv("TOKEN_UNIVERSE_TIMING", "0").lower() in ("1", "true", "yes")
+
+# Upstream traffic capture / replay (gzip NDJSON). Capture appends every upstream
+# response to the file; replay serves them back instead of the network, at
+# REPLAY_SPEED times the captured pace (0 = no delays)
+CAPTURE_PATH = os.getenv("TOKEN_UNIVERSE_CAPTURE", "")
+REPLAY_PATH = os.getenv("TOKEN_UNIVERSE_REPLAY", "")
+REPLAY_SPEED = float(os.getenv("TOKEN_UNIVERSE_REPLAY_SPEED", "1"))
+
+# Pair crawler: keeps every seen Solana pair current with batched tokens/v1
+# calls (runs with the prefetch scheduler) and backs the local screener tabs
+CRAWLER_ENABLED = os.getenv("TOKEN_UNIVERSE_CRAWLER", "1").lower() in ("1", "true", "yes")
+CRAWLER_INTERVAL_SECONDS = float(os.getenv("TOKEN_UNIVERSE_CRAWLER_INTERVAL", "15"))
+CRAWLER_TOKENS_PER_TICK = int(os.getenv("TOKEN_UNIVERSE_CRAWLER_TOKENS_PER_TICK", "120"))
+CRAWLER_MAX_PAIRS = int(os.getenv("TOKEN_UNIVERSE_CRAWLER_MAX_PAIRS", "20000"))
+CRAWLER_MAX_AGE_SECONDS = int(os.getenv("TOKEN_UNIVERSE_CRAWLER_MAX_AGE", str(24 * 3600)))
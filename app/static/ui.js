@@ -67,6 +67,80 @@ window.TokenUniverseUI = (function () {
     });
   }
 
+  // Live updates: one EventSource per page, subscribed to the exact pairs the
+  // cards show; the server pushes only the fields that changed for each pair
+  // and we patch every element tagged with data-field inside the matching
+  // [data-pair] containers.
+  let liveSource = null;
+  const RISK_CLASSES = ["low", "medium", "high", "extreme"];
+
+  function pctClass(x) {
+    const v = Number(x);
+    if (!isFinite(v)) return "flat";
+    if (v > 0.0001) return "pos";
+    if (v < -0.0001) return "neg";
+    return "flat";
+  }
+
+  function formatField(el, value) {
+    const prefix = el.getAttribute("data-prefix") || "";
+    const fmt = el.getAttribute("data-format");
+    if (fmt === "pct") {
+      const cls = pctClass(value);
+      ["pos", "neg", "flat"].forEach((c) => el.classList.toggle(c, c === cls));
+      return prefix + fmtPct(value);
+    }
+    if (fmt === "usd") return prefix + "$" + compact(value);
+    if (fmt === "num") return prefix + compact(value);
+    return prefix + (value == null ? "" : value);
+  }
+
+  function patchPair(pair, fields) {
+    const sel = `[data-pair="${window.CSS && CSS.escape ? CSS.escape(pair) : pair}"]`;
+    qsa(sel).forEach((root) => {
+      const box = root.querySelector(".metricBox");
+      if (box) {
+        if ("priceUsd" in fields) box.setAttribute("data-price", "$" + compact(fields.priceUsd));
+        if ("mcap" in fields) box.setAttribute("data-mcap", "$" + compact(fields.mcap));
+      }
+      root.querySelectorAll("[data-field]").forEach((el) => {
+        const key = el.getAttribute("data-field");
+        if (!(key in fields)) return;
+        el.textContent = formatField(el, fields[key]);
+        el.classList.remove("liveFlash");
+        void el.offsetWidth; // restart the animation
+        el.classList.add("liveFlash");
+      });
+      if (fields.riskClass) {
+        root.querySelectorAll(".riskBadge").forEach((el) => {
+          RISK_CLASSES.forEach((c) => el.classList.toggle(c, c === fields.riskClass));
+        });
+      }
+    });
+  }
+
+  // `pairs` are "mint:pairAddress" strings (see pagePairs).
+  function startLive(pairs) {
+    if (!window.EventSource) return;
+    const list = Array.from(new Set(pairs.filter(Boolean))).slice(0, 100);
+    if (liveSource) { liveSource.close(); liveSource = null; }
+    if (!list.length) return;
+
+    liveSource = new EventSource("/api/live?pairs=" + encodeURIComponent(list.join(",")));
+    liveSource.addEventListener("update", (e) => {
+      let data;
+      try { data = JSON.parse(e.data); } catch { return; }
+      Object.keys(data).forEach((pair) => patchPair(pair, data[pair]));
+      applyMetricUI();
+    });
+  }
+
+  function pagePairs(selector) {
+    return qsa(selector)
+      .filter((el) => el.getAttribute("data-token") && el.getAttribute("data-pair"))
+      .map((el) => el.getAttribute("data-token") + ":" + el.getAttribute("data-pair"));
+  }
+
   // Watchlist UI
   function initWatchButtons() {
     qsa(".tile[data-token]").forEach((tile) => {
@@ -82,6 +156,9 @@ window.TokenUniverseUI = (function () {
       };
 
       setUI();
+      // Called again after the drawer toggles a star and after grid swaps.
+      if (btn.dataset.bound) return;
+      btn.dataset.bound = "1";
       btn.addEventListener("click", (e) => {
         e.stopPropagation();
         S.toggleWatch(mint);
@@ -135,11 +212,13 @@ window.TokenUniverseUI = (function () {
       const liq = best && best.liquidity ? (best.liquidity.usd || 0) : 0;
       const vol = best && best.volume ? (best.volume.h24 || 0) : 0;
 
+      body.setAttribute("data-token", mint);
+      body.setAttribute("data-pair", best ? best.pairAddress || "" : "");
       body.innerHTML = `
         <div class="drawerGrid">
-          <div class="drawerRow"><div class="k">Market Cap</div><div class="v">$${best ? best._mcapFmt || "" : ""}</div></div>
-          <div class="drawerRow"><div class="k">Liquidity</div><div class="v">$${best ? best._liqFmt || "" : ""}</div></div>
-          <div class="drawerRow"><div class="k">Vol 24h</div><div class="v">$${best ? best._volFmt || "" : ""}</div></div>
+          <div class="drawerRow"><div class="k">Market Cap</div><div class="v" data-field="mcap" data-format="usd">$${best ? best._mcapFmt || "" : ""}</div></div>
+          <div class="drawerRow"><div class="k">Liquidity</div><div class="v" data-field="liq" data-format="usd">$${best ? best._liqFmt || "" : ""}</div></div>
+          <div class="drawerRow"><div class="k">Vol 24h</div><div class="v" data-field="vol" data-format="usd">$${best ? best._volFmt || "" : ""}</div></div>
           <div class="drawerRow"><div class="k">1h / 6h / 24h</div><div class="v">${fmtPct(h1)} • ${fmtPct(h6)} • ${fmtPct(h24)}</div></div>
         </div>
         <div class="drawerSub">Best pair: ${best ? (best.dexId + " • " + best.quoteToken.symbol) : "—"}</div>
@@ -206,19 +285,19 @@ window.TokenUniverseUI = (function () {
       return (Math.abs(v) < 10) ? `${sign}${v.toFixed(2)}%` : `${sign}${v.toFixed(1)}%`;
     }
 
-    // Hook tiles: click opens drawer; shift-click navigates as before
-    qsa(".tile[data-token]").forEach((tile) => {
-      const mint = tile.getAttribute("data-token");
-      tile.addEventListener("click", (e) => {
-        if (e.shiftKey) {
-          const href = tile.getAttribute("data-href");
-          if (href) window.location.href = href;
-          return;
-        }
-        if (e.target && e.target.classList && e.target.classList.contains("watchBtn")) return;
-        e.preventDefault();
-        loadToken(mint);
-      });
+    // Hook tiles: click opens drawer; shift-click navigates as before.
+    // Delegated so tiles in a swapped-in grid work without rebinding.
+    document.addEventListener("click", (e) => {
+      const tile = e.target && e.target.closest ? e.target.closest("#gridRegion .tile[data-token]") : null;
+      if (!tile) return;
+      if (e.shiftKey) {
+        const href = tile.getAttribute("data-href");
+        if (href) window.location.href = href;
+        return;
+      }
+      if (e.target.classList && e.target.classList.contains("watchBtn")) return;
+      e.preventDefault();
+      loadToken(tile.getAttribute("data-token"));
     });
 
     // close when clicking outside (optional, safe)
@@ -227,12 +306,56 @@ window.TokenUniverseUI = (function () {
     });
   }
 
+  // Filter/sort controls: fetch only the card grid fragment and swap it in.
+  // The fragment is served with an ETag and no-cache, so the browser
+  // revalidates and an unchanged grid costs a 304.
+  function initGridControls() {
+    const form = qs("#gridControls");
+    const region = qs("#gridRegion");
+    if (!form || !region) return;
+    const gridUrl = form.getAttribute("data-grid-url");
+    let seq = 0;
+    let lastEtag = null;
+
+    async function refresh() {
+      const params = new URLSearchParams();
+      new FormData(form).forEach((v, k) => {
+        const s = String(v).trim();
+        if (s !== "" && !(s === "0" && k !== "q")) params.set(k, s);
+      });
+      const query = params.toString();
+      const mine = ++seq;
+      region.classList.add("loading");
+      try {
+        const res = await fetch(gridUrl + (query ? "?" + query : ""), { headers: { "Accept": "text/html" } });
+        if (!res.ok || mine !== seq) return;
+        history.replaceState(null, "", location.pathname + (query ? "?" + query : ""));
+        const etag = res.headers.get("ETag");
+        if (etag && etag === lastEtag) return;
+        lastEtag = etag;
+        region.innerHTML = await res.text();
+        initWatchButtons();
+        applyMetricUI();
+        startLive(pagePairs(".tile[data-pair]"));
+      } catch (err) {
+        form.submit();
+      } finally {
+        if (mine === seq) region.classList.remove("loading");
+      }
+    }
+
+    form.addEventListener("submit", (e) => { e.preventDefault(); refresh(); });
+    form.addEventListener("change", () => refresh());
+  }
+
   // List page init
   function initListPage(opts) {
     initCommonUI();
     applyMetricUI();
     initWatchButtons();
     initDrawer();
+    initGridControls();
+    startLive(pagePairs(".tile[data-pair]"));
   }
 
   // Portfolio pages (positions/watchlist) are client-rendered
@@ -302,6 +425,7 @@ window.TokenUniverseUI = (function () {
     const div = document.createElement("div");
     div.className = `tile ${rarity}`;
     div.setAttribute("data-token", mint);
+    div.setAttribute("data-pair", best.pairAddress || "");
     div.innerHTML = `
       <div class="rankPill">${rank}</div>
       <div class="tileRow">
@@ -317,22 +441,22 @@ window.TokenUniverseUI = (function () {
             <div class="rarityPill ${rarity}">${rarity[0].toUpperCase()+rarity.slice(1)}</div>
           </div>
           <div class="badgeRow">
-            <span class="chgBadge">${fmtPct(pc.h1)}</span>
-            <span class="chgBadge">${fmtPct(pc.h6)}</span>
-            <span class="chgBadge">${fmtPct(pc.h24)}</span>
+            <span class="chgBadge" data-field="h1" data-format="pct">${fmtPct(pc.h1)}</span>
+            <span class="chgBadge" data-field="h6" data-format="pct">${fmtPct(pc.h6)}</span>
+            <span class="chgBadge" data-field="h24" data-format="pct">${fmtPct(pc.h24)}</span>
           </div>
         </div>
         <div class="tileMetric metricBox" data-price="$${compact(best.priceUsd)}" data-mcap="$${compact(mcap)}">
           <div class="metricLabel">Market Cap</div>
           <div class="metricMain">$${compact(mcap)}</div>
-          <div class="metricSub">Liq <b>$${compact(liq)}</b> • Vol <b>$${compact(vol)}</b></div>
+          <div class="metricSub">Liq <b data-field="liq" data-format="usd">$${compact(liq)}</b> • Vol <b data-field="vol" data-format="usd">$${compact(vol)}</b></div>
           <button class="watchBtn" type="button" title="Toggle watchlist">☆</button>
         </div>
       </div>
       <div class="tileStats">
         <div class="stat"><div class="statLabel">Txns 24h</div><div class="statValue">${compact(txns24(best))}</div></div>
-        <div class="stat"><div class="statLabel">Buys</div><div class="statValue">${compact(buys24(best))}</div></div>
-        <div class="stat"><div class="statLabel">Sells</div><div class="statValue">${compact(sells24(best))}</div></div>
+        <div class="stat"><div class="statLabel">Buys</div><div class="statValue" data-field="buys" data-format="num">${compact(buys24(best))}</div></div>
+        <div class="stat"><div class="statLabel">Sells</div><div class="statValue" data-field="sells" data-format="num">${compact(sells24(best))}</div></div>
       </div>
     `;
 
@@ -399,11 +523,13 @@ window.TokenUniverseUI = (function () {
     const best = data.best;
     title.textContent = best && best.baseToken ? best.baseToken.symbol : "Token";
 
+    body.setAttribute("data-token", mint);
+    body.setAttribute("data-pair", best.pairAddress || "");
     body.innerHTML = `
       <div class="drawerGrid">
-        <div class="drawerRow"><div class="k">Market Cap</div><div class="v">$${compact(best.marketCap || best.fdv || 0)}</div></div>
-        <div class="drawerRow"><div class="k">Liquidity</div><div class="v">$${compact(best.liquidity ? best.liquidity.usd : 0)}</div></div>
-        <div class="drawerRow"><div class="k">Vol 24h</div><div class="v">$${compact(best.volume ? best.volume.h24 : 0)}</div></div>
+        <div class="drawerRow"><div class="k">Market Cap</div><div class="v" data-field="mcap" data-format="usd">$${compact(best.marketCap || best.fdv || 0)}</div></div>
+        <div class="drawerRow"><div class="k">Liquidity</div><div class="v" data-field="liq" data-format="usd">$${compact(best.liquidity ? best.liquidity.usd : 0)}</div></div>
+        <div class="drawerRow"><div class="k">Vol 24h</div><div class="v" data-field="vol" data-format="usd">$${compact(best.volume ? best.volume.h24 : 0)}</div></div>
       </div>
       <div class="drawerSub">Best pair: ${best.dexId} • ${best.quoteToken.symbol}</div>
     `;
@@ -523,6 +649,7 @@ window.TokenUniverseUI = (function () {
   function initCoinPage() {
     initCommonUI();
     applyMetricUI();
+    startLive(pagePairs(".coinCard[data-pair]"));
 
     const tradePanel = qs("#coinTrade");
     if (tradePanel) {
@@ -607,6 +734,7 @@ window.TokenUniverseUI = (function () {
       bests.forEach((b, i) => cards.appendChild(renderClientCard(b, i + 1)));
 
       applyMetricUI();
+      startLive(pagePairs("#cards .tile[data-pair]"));
     }
 
     await load();
@@ -0,0 +1,4 @@
+"""
+Offline benchmarks: drives the app in-process against a deterministic
+upstream stand-in. Run `python -m bench --help`.
+"""
@@ -0,0 +1,143 @@
+"""
+Usage: python -m bench [scenario ...] [options]
+
+Runs the app in-process against the fixture upstream and prints throughput,
+latency percentiles, upstream calls and traced allocations per scenario.
+Scenarios run in order in one process, so later ones start with whatever
+the earlier ones cached (each is warmed up first anyway).
+
+Save a run with --save and check a later one against it with --compare;
+p95 or throughput moving the wrong way by more than --threshold percent is
+flagged and makes the command exit non-zero.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+REGRESSION_THRESHOLD_PCT = 10.0
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    from bench.scenarios import SCENARIOS
+
+    p = argparse.ArgumentParser(prog="python -m bench", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("scenarios", nargs="*", metavar="scenario",
+                   help=f"one or more of: {', '.join(SCENARIOS)} (default: all)")
+    p.add_argument("-n", "--requests", type=int, default=500, help="timed requests per scenario")
+    p.add_argument("-c", "--concurrency", type=int, default=16)
+    p.add_argument("--warmup", type=int, default=50, help="untimed requests before each scenario")
+    p.add_argument("--alloc-requests", type=int, default=100, help="requests traced for allocations (0 to skip)")
+    p.add_argument("--tokens", type=int, default=2000, help="size of the fixture token universe")
+    p.add_argument("--latency-ms", type=float, default=40, help="mean fixture upstream latency")
+    p.add_argument("--jitter-ms", type=float, default=20)
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream calls answered with 503")
+    p.add_argument("--drop-rate", type=float, default=0.0, help="fraction of upstream calls failing to connect")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--replay", metavar="FILE", help="serve upstream calls from a capture instead of the fixture universe")
+    p.add_argument("--replay-speed", type=float, default=0, help="replay pace vs. the capture (0: no delays)")
+    p.add_argument("--real-limits", action="store_true", help="keep the production upstream rate limits")
+    p.add_argument("--prefetch", action="store_true", help="run the background prefetch scheduler")
+    p.add_argument("--save", metavar="FILE", help="write results as JSON")
+    p.add_argument("--compare", metavar="FILE", help="compare against results saved with --save")
+    p.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD_PCT, help="regression threshold, percent")
+    args = p.parse_args(argv)
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        p.error(f"unknown scenario(s): {', '.join(unknown)}")
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    return args
+
+
+def configure_env(args: argparse.Namespace):
+    # Read by app.settings at import time, so this must run before the app is imported.
+    os.environ["TOKEN_UNIVERSE_PREFETCH"] = "1" if args.prefetch else "0"
+    os.environ.pop("TOKEN_UNIVERSE_CAPTURE", None)
+    os.environ.pop("TOKEN_UNIVERSE_REPLAY", None)
+    if not args.real_limits:
+        for name in ("DEX_RPS", "DEX_PROFILES_RPS", "RPC_RPS", "JUPITER_RPS"):
+            os.environ[f"TOKEN_UNIVERSE_{name}"] = "100000"
+
+
+def print_table(results: dict[str, dict]):
+    cols = ("requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms", "upstream_calls", "peak_kib", "retained_kib")
+    print(f"{'scenario':<10}" + "".join(f"{c:>15}" for c in cols))
+    for name, row in results.items():
+        print(f"{name:<10}" + "".join(f"{row[c]:>15}" for c in cols))
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> bool:
+    """Prints deltas against `baseline`; returns True if anything regressed."""
+    regressed = False
+    print(f"\n{'scenario':<10}{'p95 delta':>12}{'rps delta':>12}")
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        p95 = (row["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0.0
+        rps = (row["rps"] - base["rps"]) / base["rps"] * 100 if base["rps"] else 0.0
+        flag = p95 > threshold or rps < -threshold
+        regressed |= flag
+        print(f"{name:<10}{p95:>+11.1f}%{rps:>+11.1f}%" + ("  REGRESSION" if flag else ""))
+    return regressed
+
+
+async def main(args: argparse.Namespace) -> int:
+    from app.main import app
+    from app.services.http import http_clients
+    from bench.runner import run_scenario
+    from bench.scenarios import SCENARIOS
+    from bench.upstream import FixtureUpstream, ReplayUpstream
+
+    if args.replay:
+        upstream = ReplayUpstream(args.replay, args.replay_speed)
+    else:
+        upstream = FixtureUpstream(
+            tokens=args.tokens,
+            seed=args.seed,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            drop_rate=args.drop_rate,
+        )
+    http_clients.use_transport(upstream.transport())
+
+    results: dict[str, dict] = {}
+    async with app.router.lifespan_context(app):
+        for i, name in enumerate(args.scenarios):
+            result = await run_scenario(
+                app,
+                upstream,
+                name,
+                SCENARIOS[name](upstream),
+                requests=args.requests,
+                concurrency=args.concurrency,
+                warmup=args.warmup,
+                alloc_requests=args.alloc_requests,
+                seed=args.seed + i,
+            )
+            results[name] = result.as_dict()
+
+    print_table(results)
+    print(f"\nupstream calls: {dict(sorted(upstream.calls.items()))}")
+    if upstream.failures:
+        print(f"injected failures: {dict(sorted(upstream.failures.items()))}")
+    if args.replay:
+        print(f"replay: {upstream.stats()}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    configure_env(args)
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,110 @@
+import asyncio
+import random
+import time
+import tracemalloc
+
+import httpx
+
+from bench.scenarios import PathFn
+from bench.upstream import Upstream
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Result:
+    __slots__ = ("name", "requests", "errors", "seconds", "latencies_ms", "upstream_calls", "peak_kib", "retained_kib")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.requests = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.latencies_ms: list[float] = []
+        self.upstream_calls = 0
+        self.peak_kib = 0.0
+        self.retained_kib = 0.0
+
+    def as_dict(self) -> dict:
+        lat = sorted(self.latencies_ms)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rps": round(self.requests / self.seconds, 1) if self.seconds else 0.0,
+            "p50_ms": round(percentile(lat, 50), 2),
+            "p95_ms": round(percentile(lat, 95), 2),
+            "p99_ms": round(percentile(lat, 99), 2),
+            "max_ms": round(lat[-1], 2) if lat else 0.0,
+            "upstream_calls": self.upstream_calls,
+            "peak_kib": round(self.peak_kib, 1),
+            "retained_kib": round(self.retained_kib, 1),
+        }
+
+
+async def _drive(client: httpx.AsyncClient, path_fn: PathFn, rng: random.Random, requests: int, concurrency: int, result: Result | None):
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            path = path_fn(rng)
+            started = time.perf_counter()
+            try:
+                resp = await client.get(path)
+                ok = resp.status_code < 400
+            except Exception as e:
+                print(f"[bench] {path} failed: {e!r}")
+                ok = False
+            if result is not None:
+                result.latencies_ms.append((time.perf_counter() - started) * 1000)
+                result.requests += 1
+                result.errors += not ok
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_scenario(
+    app,
+    upstream: Upstream,
+    name: str,
+    path_fn: PathFn,
+    *,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    alloc_requests: int,
+    seed: int,
+) -> Result:
+    """
+    Warms the caches with `warmup` requests, times `requests` requests at
+    `concurrency`, then measures traced allocations over a separate
+    `alloc_requests` pass so tracemalloc overhead stays out of the latencies.
+    """
+    result = Result(name)
+    rng = random.Random(seed)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await _drive(client, path_fn, rng, warmup, concurrency, None)
+
+        calls_before = sum(upstream.calls.values())
+        started = time.perf_counter()
+        await _drive(client, path_fn, rng, requests, concurrency, result)
+        result.seconds = time.perf_counter() - started
+        result.upstream_calls = sum(upstream.calls.values()) - calls_before
+
+        if alloc_requests:
+            tracemalloc.start()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await _drive(client, path_fn, rng, alloc_requests, concurrency, None)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result.peak_kib = (peak - baseline) / 1024
+            result.retained_kib = (current - baseline) / 1024
+    return result
@@ -0,0 +1,85 @@
+import random
+from typing import Callable
+
+from bench.upstream import WORDS, Upstream
+
+HOT_TOKENS = 200            # coin/api scenarios mostly hit the first (boosted) tokens
+
+PathFn = Callable[[random.Random], str]
+
+
+def _hot_mint(rng: random.Random, upstream: Upstream) -> str:
+    # ~80% of lookups go to the hot set, like real traffic on trending tokens.
+    if rng.random() < 0.8:
+        return upstream.mints[rng.randrange(min(HOT_TOKENS, len(upstream.mints)))]
+    return rng.choice(upstream.mints)
+
+
+def home(upstream: Upstream) -> PathFn:
+    return lambda rng: "/"
+
+
+def search(upstream: Upstream) -> PathFn:
+    def path(rng: random.Random) -> str:
+        roll = rng.random()
+        if roll < 0.5:
+            q = rng.choice(WORDS)
+        elif roll < 0.8:
+            q = rng.choice(WORDS)[:2]
+        elif roll < 0.9:
+            q = _hot_mint(rng, upstream)
+        else:
+            q = f"{rng.choice(WORDS)}{rng.randint(0, 9999)}"        # mostly no local hit
+        sort = rng.choice(("liq", "vol", "h24"))
+        return f"/search?q={q}&sort={sort}"
+    return path
+
+
+def discover(upstream: Upstream) -> PathFn:
+    def path(rng: random.Random) -> str:
+        tab = rng.choice(("trending", "trending", "graduated", "verified"))
+        grid = "/grid" if rng.random() < 0.3 else ""
+        if rng.random() < 0.5:
+            return f"/discover/{tab}{grid}"
+        sort = rng.choice(("liq", "vol", "h1", "h24", "age"))
+        return f"/discover/{tab}{grid}?sort={sort}&min_liq={rng.choice((0, 10000, 50000))}"
+    return path
+
+
+def coin(upstream: Upstream) -> PathFn:
+    return lambda rng: f"/coin/{_hot_mint(rng, upstream)}"
+
+
+def api(upstream: Upstream) -> PathFn:
+    def path(rng: random.Random) -> str:
+        roll = rng.random()
+        if roll < 0.5:
+            return f"/api/token/{_hot_mint(rng, upstream)}"
+        if roll < 0.9:
+            tokens = "&".join(f"tokens={_hot_mint(rng, upstream)}" for _ in range(rng.randint(5, 30)))
+            return f"/api/best_pairs?{tokens}"
+        return "/api/status"
+    return path
+
+
+def mixed(upstream: Upstream) -> PathFn:
+    parts = [(0.05, home(upstream)), (0.25, search(upstream)), (0.35, discover(upstream)), (0.2, coin(upstream)), (0.15, api(upstream))]
+
+    def path(rng: random.Random) -> str:
+        roll = rng.random()
+        for weight, fn in parts:
+            if roll < weight:
+                return fn(rng)
+            roll -= weight
+        return parts[-1][1](rng)
+    return path
+
+
+SCENARIOS: dict[str, Callable[[Upstream], PathFn]] = {
+    "home": home,
+    "search": search,
+    "discover": discover,
+    "coin": coin,
+    "api": api,
+    "mixed": mixed,
+}
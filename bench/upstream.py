@@ -0,0 +1,225 @@
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from urllib.parse import unquote
+
+import httpx
+
+from app.services.capture import ReplayTransport
+
+B58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+QUOTES = (
+    ("EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v", "USDC"),
+    ("So11111111111111111111111111111111111111112", "SOL"),
+    ("Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB", "USDT"),
+)
+WORDS = (
+    "moon", "doge", "pepe", "cat", "frog", "bonk", "wif", "sol", "based", "chad",
+    "giga", "turbo", "pump", "rocket", "baby", "inu", "ai", "meme", "king", "floki",
+)
+BOOSTS_SIZE = 30
+PROFILES_SIZE = 30
+SEARCH_LIMIT = 30           # DexScreener returns at most ~30 pairs per search
+
+
+def _mint(rng: random.Random) -> str:
+    return "".join(rng.choice(B58) for _ in range(44))
+
+
+class FixtureUpstream:
+    """
+    Deterministic stand-in for DexScreener, Solana RPC and Jupiter. A seeded
+    universe of `tokens` tokens (1-3 pairs each) is generated once and served
+    from every endpoint the app calls; responses are identical across runs
+    with the same seed. Each request sleeps `latency_ms` +/- `jitter_ms`,
+    then fails with a 503 at `error_rate` or a connection error at
+    `drop_rate`. Use `transport()` with http_clients.use_transport().
+    """
+
+    def __init__(
+        self,
+        tokens: int = 2000,
+        seed: int = 7,
+        latency_ms: float = 40,
+        jitter_ms: float = 20,
+        error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self._rng = random.Random(seed + 1)     # per-request latency/error draws
+        self.calls: Counter[str] = Counter()
+        self.failures: Counter[str] = Counter()
+
+        rng = random.Random(seed)
+        now_ms = int(time.time() * 1000)
+        self.mints: list[str] = []
+        self.pairs: dict[str, list[dict]] = {}
+        self.accounts: dict[str, dict] = {}
+        for i in range(tokens):
+            mint = _mint(rng)
+            symbol = (rng.choice(WORDS) + rng.choice(WORDS)[:rng.randint(0, 4)]).upper()
+            name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}"
+            self.mints.append(mint)
+            self.pairs[mint] = [self._pair(rng, mint, symbol, name, quote, now_ms) for quote in rng.sample(QUOTES, rng.randint(1, 3))]
+            self.accounts[mint] = {
+                "mintAuthority": _mint(rng) if rng.random() < 0.2 else None,
+                "freezeAuthority": _mint(rng) if rng.random() < 0.1 else None,
+                "decimals": rng.choice((6, 9)),
+                "supply": str(rng.randint(10**9, 10**18)),
+                "isInitialized": True,
+            }
+
+    @staticmethod
+    def _pair(rng: random.Random, mint: str, symbol: str, name: str, quote: tuple[str, str], now_ms: int) -> dict:
+        liq = 10 ** rng.uniform(2, 7)
+        price = 10 ** rng.uniform(-8, 1)
+        return {
+            "chainId": "solana",
+            "dexId": rng.choice(("raydium", "orca", "meteora", "pumpswap")),
+            "url": f"https://dexscreener.com/solana/{mint[:8].lower()}",
+            "pairAddress": _mint(rng),
+            "baseToken": {"address": mint, "name": name, "symbol": symbol},
+            "quoteToken": {"address": quote[0], "name": quote[1], "symbol": quote[1]},
+            "priceNative": f"{price / 150:.12g}",
+            "priceUsd": f"{price:.12g}",
+            "txns": {w: {"buys": rng.randint(0, 5000), "sells": rng.randint(0, 5000)} for w in ("m5", "h1", "h6", "h24")},
+            "volume": {"h24": liq * rng.uniform(0.05, 20), "h6": liq * rng.uniform(0, 5), "h1": liq * rng.uniform(0, 1)},
+            "priceChange": {"m5": rng.uniform(-5, 5), "h1": rng.uniform(-20, 20), "h6": rng.uniform(-40, 40), "h24": rng.uniform(-80, 300)},
+            "liquidity": {"usd": liq, "base": liq / price / 2, "quote": liq / 2},
+            "fdv": liq * rng.uniform(2, 50),
+            "marketCap": liq * rng.uniform(2, 40),
+            "pairCreatedAt": now_ms - rng.randint(60_000, 400 * 86_400_000),
+        }
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        endpoint = self._endpoint(request)
+        self.calls[endpoint] += 1
+        delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        roll = self._rng.random()
+        if roll < self.drop_rate:
+            self.failures[endpoint] += 1
+            raise httpx.ConnectError("fixture upstream dropped the connection", request=request)
+        if roll < self.drop_rate + self.error_rate:
+            self.failures[endpoint] += 1
+            return httpx.Response(503, json={"error": "fixture upstream error"})
+        return httpx.Response(200, json=self._body(endpoint, request))
+
+    @staticmethod
+    def _endpoint(request: httpx.Request) -> str:
+        host, path = request.url.host, request.url.path
+        if request.method == "POST":
+            return "rpc"
+        if "jup.ag" in host:
+            return "jupiter:quote" if path.endswith("/quote") else "jupiter:tokens"
+        if path.startswith("/latest/dex/search"):
+            return "dex:search"
+        if path.startswith("/latest/dex/tokens/"):
+            return "dex:tokens"
+        if path.startswith("/tokens/v1/"):
+            return "dex:tokens_v1"
+        if path.startswith("/token-boosts/"):
+            return "dex:boosts"
+        if path.startswith("/token-profiles/"):
+            return "dex:profiles"
+        return "unknown"
+
+    def _body(self, endpoint: str, request: httpx.Request):
+        path = request.url.path
+        if endpoint == "dex:search":
+            return {"schemaVersion": "1.0.0", "pairs": self._search(request.url.params.get("q", ""))}
+        if endpoint == "dex:tokens":
+            return {"schemaVersion": "1.0.0", "pairs": self.pairs.get(path.rsplit("/", 1)[1], [])}
+        if endpoint == "dex:tokens_v1":
+            mints = unquote(path.rsplit("/", 1)[1]).split(",")
+            return [p for m in mints[:30] for p in self.pairs.get(m, [])]
+        if endpoint == "dex:boosts":
+            return [{"chainId": "solana", "tokenAddress": m, "amount": 500 - i, "totalAmount": 500 - i} for i, m in enumerate(self.mints[:BOOSTS_SIZE])]
+        if endpoint == "dex:profiles":
+            latest = self.mints[-PROFILES_SIZE:]
+            return [{"chainId": "solana", "tokenAddress": m, "description": "fixture profile"} for m in reversed(latest)]
+        if endpoint == "jupiter:tokens":
+            return [
+                {"chainId": 101, "address": m, "symbol": ps[0]["baseToken"]["symbol"], "name": ps[0]["baseToken"]["name"]}
+                for m, ps in self.pairs.items()
+            ]
+        if endpoint == "jupiter:quote":
+            return {"data": [{"outAmount": "1234567", "outputMintDecimals": 6}]}
+        if endpoint == "rpc":
+            return self._rpc(json.loads(request.content))
+        return {}
+
+    def _search(self, q: str) -> list[dict]:
+        q = q.strip()
+        if q in self.pairs:
+            return self.pairs[q]
+        q = q.lower()
+        if not q:
+            return []
+        out = []
+        for pairs in self.pairs.values():
+            base = pairs[0]["baseToken"]
+            if q in base["symbol"].lower() or q in base["name"].lower():
+                out.extend(pairs)
+                if len(out) >= SEARCH_LIMIT:
+                    break
+        return out[:SEARCH_LIMIT]
+
+    def _account(self, mint: str) -> dict | None:
+        info = self.accounts.get(mint)
+        if info is None:
+            return None
+        return {
+            "data": {"parsed": {"info": info, "type": "mint"}, "program": "spl-token", "space": 82},
+            "executable": False,
+            "lamports": 1461600,
+            "owner": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+        }
+
+    def _rpc(self, payload):
+        if isinstance(payload, list):
+            return [self._rpc(item) for item in payload]
+        method, params = payload.get("method"), payload.get("params") or []
+        if method == "getAccountInfo":
+            result = {"context": {"slot": 1}, "value": self._account(params[0])}
+        elif method == "getMultipleAccounts":
+            result = {"context": {"slot": 1}, "value": [self._account(m) for m in params[0]]}
+        else:
+            return {"jsonrpc": "2.0", "id": payload.get("id"), "error": {"code": -32601, "message": "Method not found"}}
+        return {"jsonrpc": "2.0", "id": payload.get("id"), "result": result}
+
+
+class ReplayUpstream:
+    """
+    A recorded capture (TOKEN_UNIVERSE_CAPTURE) in place of the fixture
+    universe: scenarios draw token addresses from the captured pairs.
+    """
+
+    def __init__(self, path: str, speed: float = 0):
+        self._replay = ReplayTransport(path, speed)
+        self.mints = self._replay.mints()
+        if not self.mints:
+            raise SystemExit(f"{path}: no DexScreener pairs in capture")
+        self.failures: Counter[str] = Counter()
+
+    @property
+    def calls(self) -> Counter[str]:
+        return self._replay.calls
+
+    def transport(self) -> ReplayTransport:
+        return self._replay
+
+    def stats(self) -> dict:
+        return self._replay.stats()
+
+
+Upstream = FixtureUpstream | ReplayUpstream
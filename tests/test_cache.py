@@ -0,0 +1,48 @@
+from app.services.cache import TTLCache, approx_size
+from app.services.pairs import SortedUniverse, to_records
+
+
+def _pair(i: int) -> dict:
+    return {
+        "chainId": "solana",
+        "pairAddress": f"pair{i}",
+        "baseToken": {"address": f"mint{i}", "symbol": f"T{i}", "name": "x" * 200},
+        "quoteToken": {"address": "usdc", "symbol": "USDC"},
+        "priceUsd": "1.5",
+        "liquidity": {"usd": 1000 * i},
+        "volume": {"h24": 10 * i},
+        "info": {"imageUrl": "https://example.com/" + "y" * 200},
+    }
+
+
+def _universe(start: int, n: int = 50) -> SortedUniverse:
+    return SortedUniverse(to_records([_pair(i) for i in range(start, start + n)]))
+
+
+def test_sorted_universe_size_counts_payload():
+    universe = _universe(0)
+    raw = sum(approx_size(r.raw) for r in universe.records)
+    assert approx_size(universe) >= raw
+    # Records appear in every order but are counted once.
+    assert approx_size(universe) < 2 * raw
+
+
+def test_byte_budget_evicts_sorted_universes():
+    one = approx_size(_universe(0))
+    cache = TTLCache(max_entries=100, max_bytes=int(one * 2.5))
+    for n in range(4):
+        cache.set(f"disc:tab{n}:USDC", _universe(n * 50), 60)
+
+    assert len(cache) == 2
+    assert cache.get("disc:tab0:USDC") is None
+    assert cache.get("disc:tab3:USDC") is not None
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.stats()["disc"]["evictions"] == 2
+
+
+def test_explicit_size_overrides_estimate():
+    cache = TTLCache(max_entries=100, max_bytes=1000)
+    cache.set("a:1", "small", 60, size=600)
+    cache.set("a:2", "small", 60, size=600)
+    assert cache.get("a:1") is None
+    assert cache.stats()["a"]["bytes"] == 600
@@ -0,0 +1,38 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import http
+from app.services.breaker import CLOSED, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def _bad_gzip(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, headers={"content-encoding": "gzip"}, content=b"not gzip")
+
+
+def test_failed_half_open_probe_reopens_the_breaker(monkeypatch):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    monkeypatch.setattr(http.breakers, "get", lambda name: breaker)
+    monkeypatch.setattr(http, "get_client", lambda service: httpx.AsyncClient(transport=httpx.MockTransport(_bad_gzip)))
+
+    with pytest.raises(httpx.DecodingError):
+        asyncio.run(http.request("dexscreener", "GET", "https://example.test/"))
+    assert breaker.state == OPEN
+    assert not breaker._probing
+
+    # The next probe goes through once the reset timeout (0 here) has passed.
+    monkeypatch.setattr(http, "get_client", lambda service: httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json={}))))
+    resp = asyncio.run(http.request("dexscreener", "GET", "https://example.test/"))
+    assert resp.status_code == 200
+    assert breaker.state == CLOSED
+
+
+def test_open_breaker_rejects_without_calling_upstream(monkeypatch):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setattr(http.breakers, "get", lambda name: breaker)
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(http.request("dexscreener", "GET", "https://example.test/"))
@@ -0,0 +1,50 @@
+import asyncio
+
+from app.services.metrics import render_metrics
+from app.services.ratelimit import RateLimiter, limiters
+from app.services.timing import ServerTimingMiddleware, stage, stage_stats
+
+
+async def _app(scope, receive, send):
+    with stage("security"):
+        await asyncio.sleep(0)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _request():
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"x-debug-timing", b"1")]}
+    asyncio.run(ServerTimingMiddleware(_app)(scope, None, send))
+    return dict(sent[0]["headers"])
+
+
+def test_stage_timings_are_exposed_in_metrics():
+    headers = _request()
+    assert headers[b"server-timing"].startswith(b"security;dur=")
+
+    text = render_metrics()
+    assert 'token_universe_request_stage_seconds_count{stage="security"}' in text
+    assert 'token_universe_request_stage_seconds_count{stage="total"}' in text
+    assert stage_stats()["security"]["count"] >= 1
+
+
+def test_rate_limit_wait_time_is_exposed(monkeypatch):
+    limiter = RateLimiter("test", rate=50, burst=1)
+    monkeypatch.setitem(limiters, "test", limiter)
+
+    async def burst():
+        await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+
+    asyncio.run(burst())
+
+    text = render_metrics()
+    assert 'token_universe_ratelimit_acquisitions_total{limiter="test"} 3' in text
+    assert 'token_universe_ratelimit_queued_total{limiter="test"} 2' in text
+    wait = next(line for line in text.splitlines() if line.startswith('token_universe_ratelimit_wait_seconds_total{limiter="test"}'))
+    # Two queued callers at 50 tokens/s wait about 20ms and 40ms.
+    assert float(wait.split()[-1]) > 0.03
@@ -0,0 +1,32 @@
+from app.services import pair_universe as pu
+from app.services.pair_universe import PairUniverse
+from app.services.pairs import to_records
+
+
+def _pair(mint: str) -> dict:
+    return {
+        "chainId": "solana",
+        "pairAddress": f"pair-{mint}",
+        "baseToken": {"address": mint, "symbol": "T"},
+        "quoteToken": {"address": "usdc", "symbol": "USDC"},
+        "liquidity": {"usd": 50_000},
+    }
+
+
+def test_watched_tokens_without_pairs_are_capped():
+    universe = PairUniverse(max_pairs=10)
+    universe.add(to_records([_pair("crawled")]))
+    universe.watch([f"junk{i}" for i in range(pu.MAX_PENDING_WATCHES + 50)])
+
+    stats = universe.stats()
+    assert stats["pending"] == pu.MAX_PENDING_WATCHES
+    assert stats["tokens"] == pu.MAX_PENDING_WATCHES + 1
+    assert [r.base_address for r in universe.records()] == ["crawled"]
+
+
+def test_crawled_watch_is_no_longer_pending():
+    universe = PairUniverse()
+    universe.watch(["mint"])
+    assert universe.stats()["pending"] == 1
+    universe.add(to_records([_pair("mint")]))
+    assert universe.stats()["pending"] == 0
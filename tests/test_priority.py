@@ -0,0 +1,93 @@
+import asyncio
+
+from app.services.ratelimit import RateLimiter, mark_background
+from app.services.singleflight import SingleFlight
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _as_background(coro):
+    mark_background()
+    return await coro
+
+
+def _empty_limiter() -> RateLimiter:
+    limiter = RateLimiter("test", rate=20, burst=1)
+    limiter._tokens = 0.0
+    return limiter
+
+
+def test_interactive_waiter_promotes_background_flight():
+    async def main():
+        limiter = _empty_limiter()
+        flights = SingleFlight()
+        order = []
+
+        async def call(name: str):
+            await limiter.acquire()
+            order.append(name)
+            return name
+
+        other = asyncio.ensure_future(_as_background(call("other")))
+        await _settle()
+        prefetch = asyncio.ensure_future(_as_background(flights.do("k", lambda: call("flight"))))
+        await _settle()
+        assert limiter.queue_depth() == {"interactive": 0, "background": 2}
+
+        page = asyncio.ensure_future(flights.do("k", lambda: call("unused")))
+        await _settle()
+        assert limiter.queue_depth() == {"interactive": 1, "background": 1}
+
+        assert await page == "flight"
+        await asyncio.gather(other, prefetch)
+        assert order == ["flight", "other"]
+
+    asyncio.run(main())
+
+
+def test_promotion_reaches_nested_flights():
+    async def main():
+        limiter = _empty_limiter()
+        flights = SingleFlight()
+
+        async def inner():
+            await limiter.acquire()
+            return "inner"
+
+        async def outer():
+            return await flights.do("inner", inner)
+
+        blocker = asyncio.ensure_future(_as_background(limiter.acquire()))
+        await _settle()
+        prefetch = asyncio.ensure_future(_as_background(flights.do("outer", outer)))
+        await _settle()
+        assert limiter.queue_depth() == {"interactive": 0, "background": 2}
+
+        page = asyncio.ensure_future(flights.do("outer", outer))
+        await _settle()
+        assert limiter.queue_depth() == {"interactive": 1, "background": 1}
+        assert await page == "inner"
+        await asyncio.gather(blocker, prefetch)
+
+    asyncio.run(main())
+
+
+def test_interactive_flight_stays_interactive_for_background_joiners():
+    async def main():
+        limiter = _empty_limiter()
+        flights = SingleFlight()
+
+        async def call():
+            await limiter.acquire()
+
+        page = asyncio.ensure_future(flights.do("k", call))
+        await _settle()
+        prefetch = asyncio.ensure_future(_as_background(flights.do("k", call)))
+        await _settle()
+        assert limiter.queue_depth() == {"interactive": 1, "background": 0}
+        await asyncio.gather(page, prefetch)
+
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+import asyncio
+import math
+import random
+import time
+
+import pytest
+
+import app.main as main
+from app.services import token_security
+from app.services.cache import TTLCache
+from app.services.pair_universe import PairUniverse
+from app.services.pairs import to_records
+from app.services.screener import COLUMNS, HOUR_MS, ColumnarSnapshot, ScreenerError, compile_filter
+
+NAN = float("nan")
+
+
+def _pair(i: int, rng: random.Random | None = None, mint: str | None = None) -> dict:
+    rng = rng or random.Random(i)
+    now_ms = int(time.time() * 1000)
+    return {
+        "chainId": "solana",
+        "pairAddress": f"pair{i}",
+        "baseToken": {"address": mint or f"mint{i}", "symbol": f"T{i}"},
+        "quoteToken": {"address": "usdc", "symbol": "USDC"},
+        "priceUsd": str(rng.uniform(0.0001, 10)),
+        "marketCap": rng.uniform(1e4, 1e9),
+        "liquidity": {"usd": rng.uniform(0, 2e6) + i * 1e-3},
+        "volume": {"h24": rng.uniform(0, 5e6)},
+        "txns": {"h24": {"buys": rng.randrange(2000), "sells": rng.randrange(2000)}},
+        # Every tenth pair has no h1 change, to cover unknown values.
+        "priceChange": {"h1": None if i % 10 == 0 else rng.uniform(-50, 50), "h24": rng.uniform(-90, 400)},
+        # Ages stay clear of whole hours so `age` bounds are not racing the clock.
+        "pairCreatedAt": now_ms - int((rng.randrange(500) + 0.5) * HOUR_MS),
+    }
+
+
+def _brute(node: tuple, r, now_ms: int) -> bool:
+    """Reference evaluator: NaN never matches a comparison, `not` flips everything."""
+    kind = node[0]
+    if kind == "and":
+        return _brute(node[1], r, now_ms) and _brute(node[2], r, now_ms)
+    if kind == "or":
+        return _brute(node[1], r, now_ms) or _brute(node[2], r, now_ms)
+    if kind == "not":
+        return not _brute(node[1], r, now_ms)
+    field = node[1]
+    if field == "age":
+        created = COLUMNS["created"](r)
+        value = (now_ms - created) / HOUR_MS if created == created else NAN
+    else:
+        value = COLUMNS[field](r)
+    if math.isnan(value):
+        return False
+    if kind == "between":
+        return node[2] <= value <= node[3]
+    op, v = node[2], node[3]
+    return {">": value > v, ">=": value >= v, "<": value < v, "<=": value <= v, "==": value == v, "!=": value != v}[op]
+
+
+@pytest.fixture(scope="module")
+def snap() -> ColumnarSnapshot:
+    rng = random.Random(7)
+    return ColumnarSnapshot(to_records([_pair(i, rng) for i in range(700)]))
+
+
+def test_parse_tree():
+    assert compile_filter("liq > 50k").tree == ("cmp", "liq", ">", 50_000.0)
+    assert compile_filter("Volume = 1.5M").tree == ("cmp", "vol", "==", 1_500_000.0)
+    assert compile_filter("h24 between 80 and -10").tree == ("between", "h24", -10.0, 80.0)
+    # and binds tighter than or; not applies to the next factor only.
+    assert compile_filter("not liq > 1 and vol > 2 or txns > 3").tree == (
+        "or",
+        ("and", ("not", ("cmp", "liq", ">", 1.0)), ("cmp", "vol", ">", 2.0)),
+        ("cmp", "txns", ">", 3.0),
+    )
+    assert compile_filter("liq > 1 and (vol > 2 or txns > 3)").tree[2][0] == "or"
+
+
+@pytest.mark.parametrize("text, message", [
+    ("", "empty filter"),
+    ("   ", "empty filter"),
+    ("liquid > 5", "unknown field 'liquid'"),
+    ("liq > ", "expected num, found end of expression"),
+    ("liq 5", "expected op"),
+    ("liq > 5 vol > 1", "expected end"),
+    ("(liq > 5", "expected )"),
+    ("liq > 5)", "expected end"),
+    ("liq > 5 ; drop", "unexpected ';'"),
+    ("liq > 5x", "unexpected"),
+    ("h24 between 1 or 2", "expected and"),
+    (" and ".join(["liq > 1"] * 33), "too many conditions"),
+    ("liq > " + "1" * 600, "longer than"),
+])
+def test_invalid_filters_raise(text, message):
+    with pytest.raises(ScreenerError, match=message.replace("(", r"\(").replace(")", r"\)")):
+        compile_filter(text)
+
+
+@pytest.mark.parametrize("text", [
+    "liq > 500k",
+    "liq >= 1m and vol < 2m",
+    "h1 > 0",
+    "h1 != 10",
+    "not h1 > 0",
+    "h24 between -10 and 80 or txns > 3000",
+    "age < 24 or age > 400",
+    "age between 10 and 100",
+    "mcap <= 1m and not (price > 5 or risk >= 60)",
+    "liq > 1e12",
+])
+def test_evaluate_matches_reference(snap, text):
+    flt = compile_filter(text)
+    now_ms = int(time.time() * 1000)
+    expected = {r.pair_address for r in snap.records if _brute(flt.tree, r, now_ms)}
+
+    mask = flt.evaluate(snap)
+    assert {r.pair_address for i, r in enumerate(snap.records) if mask >> i & 1} == expected
+
+    picked, matched = snap.screen(flt, "vol", 25)
+    assert matched == len(expected)
+    assert {r.pair_address for r in picked} <= expected
+    assert len(picked) == min(25, len(expected))
+    vols = [r.vol24 for r in picked]
+    assert vols == sorted(vols, reverse=True)
+    if len(expected) > 25:
+        assert min(vols) >= max(r.vol24 for r in snap.records if r.pair_address in expected and r not in picked)
+
+
+@pytest.fixture
+def isolated(monkeypatch):
+    """Fresh universe and cache in place of the process-wide singletons."""
+    universe, cache = PairUniverse(), TTLCache()
+    monkeypatch.setattr(main, "pair_universe", universe)
+    monkeypatch.setattr(token_security, "cache", cache)
+    return universe, cache
+
+
+def _security(mintable: bool = False, freezable: bool = False) -> dict:
+    return {
+        "mintAuthority": "auth" if mintable else None,
+        "freezeAuthority": "auth" if freezable else None,
+        "is_mintable": mintable,
+        "is_freezable": freezable,
+    }
+
+
+def test_screener_snapshot_excludes_blacklisted_mints(isolated):
+    universe, cache = isolated
+    mints = {"SafeMint111": _security(), "MintableMint111": _security(mintable=True),
+             "FreezableMint111": _security(freezable=True)}
+    for mint, sec in mints.items():
+        cache.set(f"mintsec:{mint}", sec, 60)
+    universe.add(to_records([_pair(i, mint=m) for i, m in enumerate(mints)]))
+
+    snap = asyncio.run(main._build_screener_snapshot())
+
+    assert {r.base_address for r in snap.records} == {"SafeMint111"}
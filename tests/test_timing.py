@@ -0,0 +1,53 @@
+import asyncio
+
+from app.services.timing import RequestTiming, _current, note_cache, stage, timed
+
+
+def _timed_request(fn) -> RequestTiming:
+    timing = RequestTiming()
+    token = _current.set(timing)
+    try:
+        asyncio.run(fn())
+    finally:
+        _current.reset(token)
+    return timing
+
+
+def test_cache_lookups_are_attributed_to_the_open_stage():
+    @timed("security")
+    async def security():
+        note_cache("mintsec:a", True)
+        note_cache("mintsec:b", False)
+
+    async def handler():
+        note_cache("disc:trending:USDC", True)
+        with stage("tab_universe"):
+            note_cache("tabsrc:trending", False)
+            await security()
+            note_cache("tabsrc:trending", True)
+
+    timing = _timed_request(handler)
+
+    assert timing.cache == {"disc": [1, 0], "tab_universe": [1, 1], "security": [1, 1]}
+    header = timing.header()
+    assert 'cache.security;desc="hit 1 miss 1"' in header
+    assert 'cache.tab_universe;desc="hit 1 miss 1"' in header
+    assert 'cache.disc;desc="hit 1 miss 0"' in header
+    assert "security;dur=" in header
+
+
+def test_concurrent_stages_keep_their_own_attribution():
+    async def lookup(name: str, hit: bool):
+        with stage(name):
+            await asyncio.sleep(0)
+            note_cache("x:1", hit)
+
+    async def handler():
+        await asyncio.gather(lookup("a", True), lookup("b", False))
+
+    assert _timed_request(handler).cache == {"a": [1, 0], "b": [0, 1]}
+
+
+def test_untimed_requests_ignore_cache_notes():
+    note_cache("token:a", False)
+    assert RequestTiming().header() == ""